@@ -0,0 +1,2 @@
+# Banc d'essai du pipeline : audio synthétique, modèles de substitution hors
+# ligne, mesures par étape et comparaison avec une référence enregistrée.
@@ -0,0 +1,60 @@
+import sys
+
+import numpy as np
+
+from transcriber.defaults import MAX_SEGMENT_DURATION
+
+
+# === CONTRÔLES DE NON-RÉGRESSION DE LA PLANIFICATION ===
+# Tours de parole aléatoires, dont beaucoup de fragments courts ; code de
+# sortie 1 si la planification perd de la parole ou modifie les tours par
+# défaut.
+def turns(count=400, speakers=3, seed=0):
+    from pyannote.core import Segment
+
+    rng = np.random.default_rng(seed)
+    start, segments = 0.0, []
+    for _ in range(count):
+        start += rng.uniform(0.0, 1.0)
+        duration = rng.choice([rng.uniform(0.05, 0.3), rng.uniform(0.5, 12.0)])
+        segments.append((Segment(start, start + duration), f"SPEAKER_{rng.integers(speakers):02d}"))
+        start += duration
+    return segments
+
+
+def covered(segments):
+    # Instants (au centième de seconde) couverts par au moins un segment
+    return {t for segment, _ in segments for t in range(round(segment.start * 100), round(segment.end * 100))}
+
+
+def check_defaults_unchanged(plan_segments):
+    # Valeurs par défaut : les tours de la diarisation sont transcrits tels quels
+    segments = turns()
+    planned, stats = plan_segments(segments)
+    return planned == segments, stats
+
+
+def check_no_speech_lost(plan_segments):
+    # Fusion et rattachement actifs : toute la parole reste couverte, sans
+    # dépasser la durée maximale d'un segment
+    segments = turns(seed=1)
+    planned, stats = plan_segments(segments, 0.5, MAX_SEGMENT_DURATION, 0.3)
+    longest = max(segment.duration for segment, _ in planned)
+    return covered(segments) <= covered(planned) and longest <= MAX_SEGMENT_DURATION and stats["attached"] > 0, stats
+
+
+def main():
+    from transcriber.segment_planner import plan_segments
+
+    failures = 0
+    for check in (check_defaults_unchanged, check_no_speech_lost):
+        ok, stats = check(plan_segments)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {check.__name__} : {stats}")
+    if failures:
+        print(f"\n❌ {failures} contrôle(s) de planification en échec.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import sys
+
+import numpy as np
+
+from transcriber.defaults import SAMPLE_RATE
+
+
+# === CONTRÔLES DE NON-RÉGRESSION DU VAD ===
+# Signaux synthétiques dont la part de parole est connue ; code de sortie 1
+# si le filtre retire de la parole ou laisse passer un silence.
+def speech(duration, level_db, variation_db=6.0, seed=0):
+    # Voix continue (fondamentale + harmoniques) dont le niveau varie de
+    # ±variation_db, plus un bruit de fond à -70 dB
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * 180.0 * t
+    voice = np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)
+    gain_db = level_db + variation_db * np.sin(2 * np.pi * 0.4 * t)
+    signal = voice / np.sqrt(np.mean(voice ** 2)) * 10 ** (gain_db / 20)
+    return (signal + rng.normal(0.0, 10 ** (-70 / 20), len(t))).astype(np.float32)
+
+
+def segments(bounds, speaker="SPEAKER_00"):
+    from pyannote.core import Segment
+    return [(Segment(start, end), speaker) for start, end in bounds]
+
+
+def check_speech_dominant(vad):
+    # 60 s de parole sans silence : rien ne doit être retiré
+    audio = speech(60.0, -20.0)
+    _, stats, _ = vad.apply(audio, segments([(5.0 * i, 5.0 * (i + 1)) for i in range(12)]))
+    return stats["skipped"] == 0 and stats["removed_s"] < 0.5, stats
+
+
+def check_silence_gaps(vad):
+    # Parole entrecoupée de silences : les segments de silence sont ignorés,
+    # ceux de parole conservés
+    audio = speech(60.0, -20.0)
+    audio[SAMPLE_RATE * 10:SAMPLE_RATE * 20] *= 1e-4
+    audio[SAMPLE_RATE * 40:SAMPLE_RATE * 45] *= 1e-4
+    windows, stats, _ = vad.apply(audio, segments([(0.0, 10.0), (10.5, 19.5), (20.0, 40.0), (40.5, 44.5), (45.0, 60.0)]))
+    kept = [window is not None for window in windows]
+    return kept == [True, False, True, False, True], stats
+
+
+def check_no_empty_regions(vad):
+    # Même début de parole pour deux segments : l'un commence 0,4 ms avant
+    # (borne d'origine conservée, sinon la zone retirée serait de longueur
+    # nulle une fois arrondie au RTTM), l'autre 2 s avant (rognage réel, seule
+    # zone retirée attendue)
+    audio = speech(20.0, -20.0)
+    audio[:SAMPLE_RATE * 2] *= 1e-4
+    onset = vad.apply(audio, segments([(0.0, 8.0)]))[0][0].start
+    near = onset - 0.0004
+    windows, stats, removed = vad.apply(audio, segments([(near, 8.0), (0.0, 8.0)]))
+    regions = [(round(start, 3), round(end, 3)) for start, end, _, _ in removed]
+    ok = onset > 1.0 and windows[0].start == near and windows[1].start == onset and regions == [(0.0, round(onset, 3))]
+    return ok, {**stats, "removed": regions}
+
+
+def main():
+    from transcriber.vad import VoiceActivityFilter
+
+    vad = VoiceActivityFilter()
+    failures = 0
+    for check in (check_speech_dominant, check_silence_gaps, check_no_empty_regions):
+        ok, stats = check(vad)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {check.__name__} : {stats}")
+    if failures:
+        print(f"\n❌ {failures} contrôle(s) VAD en échec.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
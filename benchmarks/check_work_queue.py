@@ -0,0 +1,150 @@
+import argparse
+import glob
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# === CONTRÔLE DU MODE DISTRIBUÉ (--shared) ===
+# Plusieurs workers de diarisation et de transcription (modèles de
+# substitution, sans ffmpeg) traitent un dossier temporaire ; l'un d'eux est
+# tué en plein bail. Chaque fichier doit être diarisé et transcrit
+# exactement une fois, et un fichier déposé à nouveau sous le même nom doit
+# être retraité. Code de sortie 1 en cas d'échec.
+
+
+def worker(stage, delay, argv):
+    # Processus worker : modèles de substitution, conversion = copie du WAV
+    from benchmarks.stubs import StubDiarizer, StubWhisper
+    import transcriber.cpu_inference as cpu_inference
+    import transcriber.diarization as diarization
+
+    class SlowDiarizer(StubDiarizer):
+        def __call__(self, *args, **kwargs):
+            time.sleep(delay)
+            return super().__call__(*args, **kwargs)
+
+    diarization.load_pipeline = lambda gpu: (SlowDiarizer(work=0), "cpu")
+    diarization.convert_to_wav = lambda input_path, wav_path: shutil.copy(input_path, wav_path)
+    cpu_inference.load_model = lambda *args, **kwargs: StubWhisper(work=0)
+    sys.argv = [stage] + argv
+    if stage == "diarize":
+        from transcriber.diarize import main
+    else:
+        from transcriber.transcribe_segments import main
+    main()
+
+
+def start(stage, folder, name, lease, delay=0.2):
+    argv = [
+        "--worker", stage, "--delay", str(delay), "--",
+        "--input", os.path.join(folder, "input"), "--output", os.path.join(folder, "output"),
+        "--cache-dir", os.path.join(folder, "cache"), "--no-cache", "--shared", "--lease", str(lease),
+    ]
+    log = open(os.path.join(folder, f"{name}.log"), "w")
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.check_work_queue"] + argv, stdout=log, stderr=subprocess.STDOUT)
+
+
+def counts(folder, pattern):
+    found = Counter()
+    for log in glob.glob(os.path.join(folder, "*.log")):
+        with open(log, encoding="utf-8") as f:
+            found.update(re.findall(pattern, f.read()))
+    return found
+
+
+def run_round(folder, names, args, victim):
+    # Un worker lent prend un bail puis est tué (SIGKILL) ; les autres
+    # démarrent ensuite, dont les transcripteurs avant toute diarisation.
+    output = os.path.join(folder, "output")
+    processes = []
+    if victim:
+        killed = start("diarize", folder, "victim", args.lease, delay=60)
+        while not glob.glob(os.path.join(output, ".claims", "diarize", "*.claim")):
+            time.sleep(0.05)
+        killed.send_signal(signal.SIGKILL)
+        killed.wait()
+    for i in range(args.transcribe_workers):
+        processes.append(start("transcribe", folder, f"transcribe-{victim}-{i}", args.lease))
+    time.sleep(1.0)
+    for i in range(args.diarize_workers):
+        processes.append(start("diarize", folder, f"diarize-{victim}-{i}", args.lease))
+    for process in processes:
+        process.wait(timeout=args.timeout)
+    return [process.returncode for process in processes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle du mode distribué : workers concurrents sur un dossier temporaire")
+    parser.add_argument("--files", type=int, default=6, help="Enregistrements synthétiques")
+    parser.add_argument("--diarize-workers", type=int, default=3, help="Workers de diarisation")
+    parser.add_argument("--transcribe-workers", type=int, default=2, help="Workers de transcription")
+    parser.add_argument("--lease", type=float, default=2.0, help="Durée des baux (secondes)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Durée maximale d'un worker (secondes)")
+    parser.add_argument("--keep", action="store_true", help="Conserve le dossier temporaire (journaux des workers)")
+    parser.add_argument("--worker", choices=("diarize", "transcribe"), help=argparse.SUPPRESS)
+    parser.add_argument("--delay", type=float, default=0.2, help=argparse.SUPPRESS)
+    args, rest = parser.parse_known_args()
+    if args.worker:
+        worker(args.worker, args.delay, [arg for arg in rest if arg != "--"])
+        return
+
+    from benchmarks.synthetic import make_recording
+    from transcriber.defaults import QUEUE_POLL
+
+    folder = tempfile.mkdtemp(prefix="transcriber-queue-")
+    input_folder = os.path.join(folder, "input")
+    names = [f"rec_{i:02d}" for i in range(args.files)]
+    for i, name in enumerate(names):
+        make_recording(input_folder, name.replace("_", " "), 20.0, 2, seed=i)
+    for rttm in glob.glob(os.path.join(input_folder, "*.rttm")):
+        os.remove(rttm)
+    print(f"📂 {folder} : {args.files} fichier(s), {args.diarize_workers} diariseur(s) + {args.transcribe_workers} "
+          f"transcripteur(s), bail {args.lease:g} s (scrutation toutes les {QUEUE_POLL:g} s)")
+
+    failures = []
+    start_time = time.time()
+    codes = run_round(folder, names, args, victim=True)
+    # Même nom, nouveau contenu : le fichier doit être retraité
+    make_recording(input_folder, names[0], 15.0, 2, seed=99)
+    os.remove(os.path.join(input_folder, f"{names[0]}.rttm"))
+    codes += run_round(folder, names, args, victim=False)
+    print(f"⏱️ {time.time() - start_time:.0f} s")
+
+    diarized = counts(folder, r"📦 Fichier archivé : .*/(\S+)\.wav")
+    transcribed = counts(folder, r"🎙️  Transcription de : (\S+) \(")
+    reclaimed = counts(folder, r"♻️ Bail expiré de \S+ repris pour (\S+)")
+    expected = Counter(names) + Counter([names[0]])
+    if any(codes):
+        failures.append(f"codes de sortie des workers : {codes}")
+    if diarized != expected:
+        failures.append(f"diarisations par fichier : {dict(diarized)}")
+    if transcribed != expected:
+        failures.append(f"transcriptions par fichier : {dict(transcribed)}")
+    if sum(reclaimed.values()) != 1:
+        failures.append(f"baux repris : {dict(reclaimed)}")
+    missing = [name for name in names if not os.path.exists(os.path.join(folder, "output", "transcripts", f"{name}.txt"))]
+    if missing:
+        failures.append(f"transcriptions manquantes : {missing}")
+    if os.listdir(input_folder):
+        failures.append(f"fichiers non traités : {os.listdir(input_folder)}")
+
+    print(f"{'✅' if not failures else '❌'} diarisés {sum(diarized.values())}, transcrits {sum(transcribed.values())}, "
+          f"baux repris {sum(reclaimed.values())}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if args.keep or failures:
+        print(f"📝 Journaux des workers : {folder}")
+    else:
+        shutil.rmtree(folder)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
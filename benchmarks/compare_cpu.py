@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+
+from transcriber.defaults import DEFAULT_CACHE_DIR, MODEL_MAP, SAMPLE_RATE
+
+
+# === TAUX D'ERREUR PAR MOT ===
+def words(text):
+    return re.findall(r"\w+(?:'\w+)?", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    # Distance d'édition sur les mots, rapportée à la longueur de la référence
+    ref, hyp = words(reference), words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, other in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+# === AUDIO DE TEST ===
+def load_audio(args, workdir):
+    # Paires audio / transcription de référence (--reference), fichiers réels
+    # (--audio, référence <nom>.txt reprise si elle existe), sinon les
+    # enregistrements synthétiques du banc d'essai (vitesse seulement).
+    from benchmarks.synthetic import make_recording
+    from transcriber.audio_source import SegmentSource
+
+    pairs = [tuple(pair) for pair in args.reference or ()]
+    for path in args.audio or ():
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        pairs.append((path, reference_path if os.path.exists(reference_path) else None))
+    if not pairs:
+        pairs = [
+            (make_recording(workdir, f"bench_{i:02d}", args.duration, args.speakers, seed=args.seed + i)[0], None)
+            for i in range(args.files)
+        ]
+    recordings = []
+    for path, reference_path in pairs:
+        reference = None
+        if reference_path:
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        recordings.append((os.path.basename(path), SegmentSource.from_wav(path).audio, reference))
+    return recordings
+
+
+def transcribe_all(model, recordings, language, repeat):
+    # Médiane des temps sur `repeat` passes ; textes de la dernière passe
+    timings, texts = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [model.transcribe(audio, language=language, fp16=False)["text"].strip() for _, audio, _ in recordings]
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2], texts
+
+
+def compare_model(model_name, recordings, args):
+    import whisper
+    from transcriber.cpu_inference import load_quantized_model, quantized_path
+
+    audio_seconds = sum(len(audio) for _, audio, _ in recordings) / SAMPLE_RATE
+    result = {"model": model_name}
+
+    start = time.perf_counter()
+    model = whisper.load_model(model_name, device="cpu")
+    result["fp32_load_s"] = round(time.perf_counter() - start, 3)
+    result["fp32_mb"] = round(sum(p.numel() * p.element_size() for p in model.state_dict().values()) / 1e6, 1)
+    fp32_wall, fp32_texts = transcribe_all(model, recordings, args.lang, args.repeat)
+    del model
+
+    # Premier chargement (quantification + écriture du cache) puis chargement depuis le cache
+    path = quantized_path(args.cache_dir, model_name)
+    if os.path.exists(path) and not args.keep_cache:
+        os.remove(path)
+    start = time.perf_counter()
+    load_quantized_model(model_name, args.cache_dir)
+    result["int8_first_load_s"] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    model = load_quantized_model(model_name, args.cache_dir)
+    result["int8_cached_load_s"] = round(time.perf_counter() - start, 3)
+    result["int8_mb"] = round(os.path.getsize(path) / 1e6, 1)
+    int8_wall, int8_texts = transcribe_all(model, recordings, args.lang, args.repeat)
+    del model
+
+    result["fp32_rtf"] = round(fp32_wall / audio_seconds, 4)
+    result["int8_rtf"] = round(int8_wall / audio_seconds, 4)
+    result["speedup"] = round(fp32_wall / max(int8_wall, 1e-9), 2)
+    # Écart int8 / fp32 (même texte attendu), et WER réel sur les
+    # enregistrements accompagnés d'une référence
+    result["wer_vs_fp32"] = round(word_error_rate(" ".join(fp32_texts), " ".join(int8_texts)), 4)
+    scored = [i for i, (_, _, reference) in enumerate(recordings) if reference]
+    accurate = result["wer_vs_fp32"] <= args.max_wer
+    if scored:
+        reference = " ".join(recordings[i][2] for i in scored)
+        result["fp32_wer"] = round(word_error_rate(reference, " ".join(fp32_texts[i] for i in scored)), 4)
+        result["int8_wer"] = round(word_error_rate(reference, " ".join(int8_texts[i] for i in scored)), 4)
+        # Sur parole réelle, c'est la perte de WER qui compte
+        accurate = result["int8_wer"] - result["fp32_wer"] <= args.max_wer
+    result["int8_recommended"] = result["speedup"] >= args.min_speedup and accurate
+    return result
+
+
+def print_results(results, audio_seconds):
+    print(f"\n📊 fp32 / int8 sur {audio_seconds / 60:.1f} min d'audio")
+    print(f"{'modèle':<10}{'RTF fp32':>10}{'RTF int8':>10}{'gain':>7}{'WER/fp32':>10}{'Mo fp32':>9}{'Mo int8':>9}"
+          f"{'charg. int8':>13}  conseil")
+    for r in results:
+        verdict = "int8" if r["int8_recommended"] else "fp32"
+        print(f"{r['model']:<10}{r['fp32_rtf']:>10.3f}{r['int8_rtf']:>10.3f}{r['speedup']:>6.2f}×{100 * r['wer_vs_fp32']:>9.1f}%"
+              f"{r['fp32_mb']:>9.0f}{r['int8_mb']:>9.0f}{r['int8_cached_load_s']:>12.1f}s  {verdict}")
+        if "int8_wer" in r:
+            print(f"{'':<10}WER référence : fp32 {100 * r['fp32_wer']:.1f} %, int8 {100 * r['int8_wer']:.1f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Whisper fp32 et int8 (--cpu-optimized) : vitesse et précision")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"], help="Modèles à comparer (noms ou numéros 1 à 6)")
+    parser.add_argument("--reference", nargs=2, action="append", metavar=("AUDIO", "TEXTE"), help="Audio réel et sa transcription de référence (répétable) : WER mesuré")
+    parser.add_argument("--audio", nargs="*", default=None, help="Fichiers audio réels (référence <nom>.txt reprise si présente) ; sans --reference ni --audio, audio synthétique")
+    parser.add_argument("--files", type=int, default=1, help="Enregistrements synthétiques sans --reference ni --audio")
+    parser.add_argument("--duration", type=float, default=60.0, help="Durée des enregistrements synthétiques (secondes)")
+    parser.add_argument("--speakers", type=int, default=2, help="Locuteurs des enregistrements synthétiques")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des enregistrements synthétiques")
+    parser.add_argument("--lang", type=str, default="fr", help="Langue de transcription")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes de transcription par modèle (médiane retenue)")
+    parser.add_argument("--cache-dir", type=str, default=os.getenv("CACHE_FOLDER", DEFAULT_CACHE_DIR), help="Dossier du cache des modèles int8")
+    parser.add_argument("--keep-cache", action="store_true", help="Réutilise un modèle int8 déjà en cache (temps de quantification non mesuré)")
+    parser.add_argument("--min-speedup", type=float, default=1.2, help="Gain minimal pour conseiller int8")
+    parser.add_argument("--max-wer", type=float, default=0.05, help="Perte de WER maximale (ou, sans référence, écart de texte int8 / fp32) pour conseiller int8")
+    parser.add_argument("--output", type=str, default="benchmarks/cpu_comparison.json", help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    from transcriber.cpu_inference import physical_cores, tune_threads
+
+    threads = tune_threads()
+    print(f"🧵 {threads} threads torch ({physical_cores()} cœurs physiques)")
+    with tempfile.TemporaryDirectory(prefix="transcriber-cpu-") as workdir:
+        recordings = load_audio(args, workdir)
+        audio_seconds = sum(len(audio) for _, audio, _ in recordings) / SAMPLE_RATE
+        references = sum(reference is not None for _, _, reference in recordings)
+        if not references:
+            print("⚠️ Aucune transcription de référence (--reference AUDIO TEXTE) : vitesse seulement, "
+                  "l'écart int8 / fp32 n'est pas un taux d'erreur.")
+        results = [compare_model(MODEL_MAP.get(name, name), recordings, args) for name in args.models]
+    print_results(results, audio_seconds)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({
+            "threads": threads, "audio_seconds": audio_seconds, "language": args.lang,
+            "recordings": [name for name, _, _ in recordings], "references": references, "models": results,
+        }, f, indent=2)
+    print(f"\n📝 Résultats : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
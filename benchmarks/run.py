@@ -0,0 +1,233 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from transcriber.defaults import BATCH_SECONDS, BATCH_SIZE, MAX_SEGMENT_DURATION, MERGE_GAP, MIN_SEGMENT_DURATION
+
+# Étapes mesurées, dans l'ordre d'exécution (le pic RSS du processus étant
+# monotone, l'ordre reste fixe pour que les valeurs soient comparables).
+STAGES = ("decode", "rttm", "plan", "diarize", "diarize_windowed", "transcribe", "single_pass", "pipeline")
+
+
+def peak_rss_mb():
+    from transcriber.windowed_diarization import peak_rss_mb
+    return peak_rss_mb()
+
+
+# === CHARGEMENT DES MODÈLES ===
+def load_models(args):
+    # Modèles de substitution par défaut : hors ligne, sans GPU ni token
+    if args.real_models:
+        import whisper
+        from transcriber.diarization import load_pipeline
+        pipeline, _ = load_pipeline(args.gpu)
+        return pipeline, whisper.load_model(args.model, device="cuda" if args.gpu else "cpu")
+    from benchmarks.stubs import StubDiarizer, StubWhisper
+    return StubDiarizer(work=args.stub_work), StubWhisper(work=args.stub_work)
+
+
+# === MESURE D'UNE ÉTAPE ===
+def measure(work, repeat, quiet):
+    # Médiane des temps sur `repeat` exécutions ; sorties du pipeline masquées
+    timings = []
+    result = None
+    for _ in range(repeat):
+        sink = io.StringIO()
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(sink))
+                stack.enter_context(contextlib.redirect_stderr(sink))
+            start = time.perf_counter()
+            result = work()
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def run_benchmark(args):
+    from benchmarks.synthetic import make_recording
+    from transcriber.audio_source import SegmentSource
+    from transcriber.diarization import diarize_to_rttm
+    from transcriber.segment_planner import plan_segments
+    from transcriber.segment_store import SegmentStore
+    from transcriber.transcription import transcribe_file
+    from transcriber.windowed_diarization import WindowedDiarizer
+
+    pipeline, model = load_models(args)
+    options = {
+        "batch_size": args.batch_size, "batch_seconds": args.batch_seconds, "merge_gap": args.merge_gap,
+        "max_segment": args.max_segment, "min_segment": args.min_segment, "language": args.lang,
+        "model_name": args.model,
+    }
+    totals = {stage: {"wall_s": 0.0, "segments": 0} for stage in STAGES}
+    rss = {}
+    audio_seconds = 0.0
+
+    with tempfile.TemporaryDirectory(prefix="transcriber-bench-") as workdir:
+        data = os.path.join(workdir, "data")
+        out = os.path.join(workdir, "out")
+        os.makedirs(out)
+        recordings = [
+            make_recording(data, f"bench_{i:02d}", args.duration, args.speakers, args.turns_per_minute, args.seed + i)
+            for i in range(args.files)
+        ]
+        audio_seconds = args.duration * args.files
+
+        def record(stage, work, segments=0):
+            wall, result = measure(work, args.repeat, not args.verbose)
+            totals[stage]["wall_s"] += wall
+            totals[stage]["segments"] += segments
+            rss[stage] = peak_rss_mb()
+            return result
+
+        for wav_path, rttm_path, turns in recordings:
+            base = os.path.splitext(os.path.basename(wav_path))[0]
+            record("decode", lambda: SegmentSource.from_wav(wav_path))
+            store = record("rttm", lambda: SegmentStore.from_rttm(rttm_path), turns)
+            planned, _ = record("plan", lambda: plan_segments(
+                store.itersegments(), args.merge_gap, args.max_segment, args.min_segment), turns)
+            out_rttm = os.path.join(out, f"{base}.rttm")
+            record("diarize", lambda: diarize_to_rttm(pipeline, wav_path, out_rttm), turns)
+            if args.window:
+                windowed = WindowedDiarizer(pipeline, args.window, args.window_overlap)
+                record("diarize_windowed", lambda: diarize_to_rttm(windowed, wav_path, out_rttm), turns)
+            record("transcribe", lambda: transcribe_file(wav_path, rttm_path, out, model, **options), len(planned))
+            record("single_pass", lambda: transcribe_file(
+                wav_path, rttm_path, out, model, single_pass=True, **options), turns)
+
+        # Pipeline complet (conversion ffmpeg → diarisation → transcription) si ffmpeg est présent
+        if shutil.which("ffmpeg"):
+            from transcriber.orchestrator import PipelineRunner
+
+            def run_pipeline():
+                inbox = os.path.join(workdir, "inbox")
+                shutil.rmtree(inbox, ignore_errors=True)
+                os.makedirs(inbox)
+                for wav_path, _, _ in recordings:
+                    shutil.copy(wav_path, os.path.join(inbox, "in_" + os.path.basename(wav_path)))
+                runner = PipelineRunner(inbox, os.path.join(workdir, "pipeline"), model=args.model,
+                                        language=args.lang, transcribe_options={
+                                            key: options[key] for key in ("batch_size", "batch_seconds", "merge_gap", "max_segment", "min_segment")
+                                        })
+                runner.pipeline = runner.diarizer = pipeline
+                runner.model = model
+                if any(stage.failed for stage in runner.run()):
+                    raise RuntimeError("Le pipeline complet a échoué (relancer avec --verbose)")
+
+            record("pipeline", run_pipeline, sum(turns for _, _, turns in recordings))
+
+    stages = {}
+    for stage in STAGES:
+        if stage not in rss:
+            continue
+        wall = totals[stage]["wall_s"]
+        stages[stage] = {
+            "wall_s": round(wall, 6),
+            "rtf": round(wall / audio_seconds, 5),
+            "segments_per_s": round(totals[stage]["segments"] / wall, 2) if totals[stage]["segments"] and wall else None,
+            "peak_rss_mb": round(rss[stage], 1),
+        }
+    return {
+        "config": {
+            "files": args.files, "duration": args.duration, "speakers": args.speakers,
+            "turns_per_minute": args.turns_per_minute, "seed": args.seed, "repeat": args.repeat,
+            "models": args.model if args.real_models else f"stub(work={args.stub_work})",
+            "batch_size": args.batch_size, "window": args.window,
+        },
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "audio_seconds": audio_seconds,
+        "stages": stages,
+    }
+
+
+# === COMPARAISON AVEC LA RÉFÉRENCE ===
+def compare(results, baseline, tolerance, min_delta=0.01):
+    # Renvoie la liste des régressions (temps ou pic mémoire au-delà de la
+    # tolérance) ; les écarts de temps sous `min_delta` secondes sont du bruit.
+    if baseline.get("config") != results["config"]:
+        print("⚠️ Configuration différente de la référence : comparaison indicative.")
+    regressions = []
+    print(f"\n{'étape':<18}{'réf. (s)':>10}{'actuel (s)':>12}{'écart':>9}{'RSS réf.':>10}{'RSS':>8}")
+    for stage, current in results["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            print(f"{stage:<18}{'-':>10}{current['wall_s']:>12.3f}{'nouveau':>9}")
+            continue
+        ratio = current["wall_s"] / max(reference["wall_s"], 1e-9)
+        flags = []
+        if ratio > 1 + tolerance and current["wall_s"] - reference["wall_s"] > min_delta:
+            flags.append("temps")
+        if current["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            flags.append("mémoire")
+        if flags:
+            regressions.append((stage, flags))
+        print(f"{stage:<18}{reference['wall_s']:>10.3f}{current['wall_s']:>12.3f}{100 * (ratio - 1):>+8.1f}%"
+              f"{reference['peak_rss_mb']:>10.0f}{current['peak_rss_mb']:>8.0f}  {'❌ ' + ', '.join(flags) if flags else '✅'}")
+    return regressions
+
+
+def print_results(results):
+    print(f"\n📊 {results['audio_seconds'] / 60:.1f} min d'audio synthétique ({results['config']['models']})")
+    print(f"{'étape':<18}{'temps (s)':>10}{'RTF':>10}{'seg/s':>10}{'pic RSS (Mo)':>14}")
+    for stage, metrics in results["stages"].items():
+        seg_rate = f"{metrics['segments_per_s']:.1f}" if metrics["segments_per_s"] else "-"
+        print(f"{stage:<18}{metrics['wall_s']:>10.3f}{metrics['rtf']:>10.4f}{seg_rate:>10}{metrics['peak_rss_mb']:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du pipeline sur audio synthétique")
+    parser.add_argument("--files", type=int, default=2, help="Nombre d'enregistrements synthétiques")
+    parser.add_argument("--duration", type=float, default=300.0, help="Durée de chaque enregistrement (secondes)")
+    parser.add_argument("--speakers", type=int, default=3, help="Nombre de locuteurs par enregistrement")
+    parser.add_argument("--turns-per-minute", type=float, default=12.0, help="Densité des tours de parole")
+    parser.add_argument("--seed", type=int, default=0, help="Graine de génération (résultats déterministes)")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions par étape (médiane retenue)")
+    parser.add_argument("--real-models", action="store_true", help="Utilise Whisper et pyannote au lieu des modèles de substitution")
+    parser.add_argument("--stub-work", type=int, default=256, help="Charge de calcul des modèles de substitution (0 = aucune)")
+    parser.add_argument("--model", type=str, default="base", help="Modèle Whisper (avec --real-models)")
+    parser.add_argument("--gpu", action="store_true", help="GPU pour les vrais modèles")
+    parser.add_argument("--lang", type=str, default="fr", help="Langue de transcription")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Segments par lot Whisper")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS, help="Durée audio maximale par lot")
+    parser.add_argument("--merge-gap", type=float, default=MERGE_GAP, help="Écart de fusion des tours (secondes)")
+    parser.add_argument("--max-segment", type=float, default=MAX_SEGMENT_DURATION, help="Durée maximale d'un segment fusionné")
+    parser.add_argument("--min-segment", type=float, default=MIN_SEGMENT_DURATION, help="Durée minimale d'un fragment isolé")
+    parser.add_argument("--window", type=float, default=120.0, help="Fenêtre de la diarisation fenêtrée mesurée (0 = étape ignorée)")
+    parser.add_argument("--window-overlap", type=float, default=10.0, help="Recouvrement des fenêtres (secondes)")
+    parser.add_argument("--output", type=str, default="benchmarks/results.json", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", type=str, default=None, help="Résultats de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Écart relatif toléré avant de signaler une régression")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="Écart de temps absolu (secondes) en dessous duquel aucune régression n'est signalée")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistre les résultats comme nouvelle référence (--baseline)")
+    parser.add_argument("--verbose", action="store_true", help="Affiche les sorties du pipeline pendant les mesures")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_results(results)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📝 Résultats : {args.output}")
+
+    if args.baseline and args.update_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f"📌 Référence mise à jour : {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà de {100 * args.tolerance:.0f} %.")
+            sys.exit(1)
+        print("\n✅ Aucune régression.")
+
+
+if __name__ == "__main__":
+    main()
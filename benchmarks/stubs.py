@@ -0,0 +1,119 @@
+import types
+
+import numpy as np
+import torch
+from pyannote.core import Annotation, Segment
+from whisper.decoding import DecodingResult
+
+from benchmarks.synthetic import SPEAKER_PITCH
+from transcriber.audio_source import SegmentSource
+from transcriber.defaults import SAMPLE_RATE
+
+FRAME = SAMPLE_RATE // 10  # trames de 100 ms
+SPEECH_RMS = 0.02
+
+
+# === ANALYSE COMMUNE ===
+def _as_float(audio):
+    # Chemin WAV, entrée pyannote {"waveform", "sample_rate"} ou tableau float32
+    if isinstance(audio, str):
+        return SegmentSource.from_wav(audio).audio
+    if isinstance(audio, dict) and "audio" in audio:
+        return SegmentSource.from_wav(audio["audio"]).audio
+    if isinstance(audio, dict):
+        return audio["waveform"][0].numpy()
+    return np.asarray(audio, dtype=np.float32)
+
+
+def _frames(audio):
+    # (voisement, indice de locuteur) par trame ; locuteur = fréquence
+    # dominante la plus proche des hauteurs synthétiques
+    n = len(audio) // FRAME
+    frames = audio[:n * FRAME].reshape(n, FRAME)
+    voiced = np.sqrt(np.mean(frames ** 2, axis=1)) > SPEECH_RMS
+    peak = np.argmax(np.abs(np.fft.rfft(frames, axis=1))[:, 1:], axis=1) + 1
+    pitch = peak * SAMPLE_RATE / FRAME
+    speaker = np.argmin(np.abs(pitch[:, None] - np.array(SPEAKER_PITCH)[None, :]), axis=1)
+    return voiced, speaker
+
+
+def _busy_work(weights, n):
+    # Charge de calcul proportionnelle à la durée audio, pour simuler un modèle
+    if weights is None or n <= 0:
+        return
+    torch.relu(torch.ones(n, weights.shape[0]) @ weights).sum()
+
+
+# === DIARISATION DE SUBSTITUTION ===
+# Même interface qu'un pipeline pyannote : appelable sur un chemin ou une
+# forme d'onde, avec return_embeddings pour la diarisation fenêtrée.
+class StubDiarizer:
+    def __init__(self, work=256, seed=0):
+        generator = torch.Generator().manual_seed(seed)
+        self.weights = torch.randn(work, work, generator=generator) if work else None
+
+    def __call__(self, audio, return_embeddings=False, num_speakers=None, min_speakers=None, max_speakers=None):
+        samples = _as_float(audio)
+        voiced, speaker = _frames(samples)
+        _busy_work(self.weights, len(voiced))
+        annotation = Annotation(uri=audio.get("uri") if isinstance(audio, dict) else None)
+        local = {}
+        start = None
+        for i in range(len(voiced) + 1):
+            current = speaker[i] if i < len(voiced) and voiced[i] else None
+            previous = speaker[i - 1] if i > 0 and voiced[i - 1] else None
+            if start is not None and current != previous:
+                label = local.setdefault(previous, f"SPEAKER_{len(local):02d}")
+                annotation[Segment(start * FRAME / SAMPLE_RATE, i * FRAME / SAMPLE_RATE), len(annotation)] = label
+                start = None
+            if current is not None and start is None:
+                start = i
+        if not return_embeddings:
+            return annotation
+        # Embedding = indicatrice du locuteur synthétique, dans l'ordre de annotation.labels()
+        by_label = {label: index for index, label in local.items()}
+        embeddings = np.zeros((len(by_label), len(SPEAKER_PITCH)), dtype=np.float32)
+        for row, label in enumerate(annotation.labels()):
+            embeddings[row, by_label[label]] = 1.0
+        return annotation, embeddings
+
+
+# === WHISPER DE SUBSTITUTION ===
+# Expose ce qu'utilisent BatchTranscriber et transcribe_words : decode sur un
+# lot de mel, transcribe sur un tableau audio. Le texte donne le nombre de
+# secondes voisées, ce qui suffit pour vérifier l'ordre et le contenu.
+class StubWhisper:
+    is_multilingual = True
+    num_languages = 99
+
+    def __init__(self, work=256, seed=0):
+        generator = torch.Generator().manual_seed(seed)
+        self.dims = types.SimpleNamespace(n_mels=80)
+        self.device = torch.device("cpu")
+        self.weights = torch.randn(80, work, generator=generator) if work else None
+
+    def decode(self, mel, options):
+        results = []
+        for item in mel:
+            if self.weights is not None:
+                torch.relu(item.T @ self.weights).sum()
+            voiced = int((item.max(dim=0).values > 0.0).sum()) // 100
+            results.append(DecodingResult(
+                audio_features=None, language=options.language, tokens=[],
+                text=f" {voiced} s de parole" if voiced else "",
+                avg_logprob=-0.2 if voiced else -1.5, no_speech_prob=0.05 if voiced else 0.9,
+                temperature=0.0, compression_ratio=1.0,
+            ))
+        return results
+
+    def transcribe(self, audio, language=None, fp16=False, word_timestamps=False, **kwargs):
+        samples = _as_float(audio)
+        voiced, _ = _frames(samples)
+        _busy_work(self.weights, len(voiced))
+        words = [
+            {"word": " mot", "start": i * FRAME / SAMPLE_RATE, "end": (i + 1) * FRAME / SAMPLE_RATE}
+            for i in np.flatnonzero(voiced[::5]) * 5
+        ]
+        text = "".join(word["word"] for word in words)
+        segment = {"text": text, "words": words} if word_timestamps else {"text": text}
+        return {"text": text, "segments": [segment], "language": language}
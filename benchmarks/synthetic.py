@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+from transcriber.defaults import SAMPLE_RATE
+from transcriber.diarization import write_wav
+from transcriber.segment_store import SegmentStore
+
+# Fréquence fondamentale de chaque locuteur synthétique (Hz) ; les modèles
+# de substitution retrouvent le locuteur à partir de cette fréquence.
+SPEAKER_PITCH = (120.0, 210.0, 300.0, 390.0, 480.0, 570.0)
+
+
+# === TOURS DE PAROLE ===
+def make_turns(duration, speakers=2, turns_per_minute=12.0, seed=0):
+    # Tours consécutifs sans chevauchement : durée exponentielle autour de la
+    # moyenne donnée par la densité, silences de 0.1 à 1.5 s entre les tours.
+    rng = np.random.default_rng(seed)
+    mean_turn = 60.0 / max(turns_per_minute, 1e-6)
+    starts, ends, labels = [], [], []
+    t = rng.uniform(0.0, 1.0)
+    speaker = 0
+    while t < duration - 0.5:
+        length = min(max(rng.exponential(mean_turn), 0.3), duration - t)
+        starts.append(t)
+        ends.append(t + length)
+        labels.append(speaker)
+        t += length + rng.uniform(0.1, 1.5)
+        speaker = (speaker + rng.integers(1, speakers)) % speakers if speakers > 1 else 0
+    return np.array(starts), np.array(ends), np.array(labels, dtype=np.int32)
+
+
+# === SIGNAL ===
+def render(duration, starts, ends, labels, seed=0):
+    # Voix = fondamentale + deux harmoniques modulées, sur un bruit de fond faible
+    rng = np.random.default_rng(seed)
+    n = int(duration * SAMPLE_RATE)
+    signal = rng.normal(0.0, 0.003, n).astype(np.float32)
+    pitch = np.zeros(n, dtype=np.float32)
+    first = (starts * SAMPLE_RATE).astype(np.int64)
+    last = np.minimum((ends * SAMPLE_RATE).astype(np.int64), n)
+    for a, b, label in zip(first, last, labels):
+        pitch[a:b] = SPEAKER_PITCH[label % len(SPEAKER_PITCH)]
+    phase = 2 * np.pi * np.cumsum(pitch, dtype=np.float64) / SAMPLE_RATE
+    envelope = (pitch > 0) * (0.6 + 0.4 * np.sin(2 * np.pi * 3.0 * np.arange(n) / SAMPLE_RATE))
+    voice = np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)
+    signal += (0.2 * envelope * voice).astype(np.float32)
+    return (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+# === ENREGISTREMENT COMPLET (WAV + RTTM DE RÉFÉRENCE) ===
+def make_recording(folder, name, duration, speakers=2, turns_per_minute=12.0, seed=0):
+    # Déterministe pour une même graine ; renvoie (chemin WAV, chemin RTTM, nb de tours)
+    os.makedirs(folder, exist_ok=True)
+    starts, ends, labels = make_turns(duration, speakers, turns_per_minute, seed)
+    wav_path = os.path.join(folder, f"{name}.wav")
+    rttm_path = os.path.join(folder, f"{name}.rttm")
+    write_wav(render(duration, starts, ends, labels, seed), wav_path)
+    names = np.array([f"SPEAKER_{k:02d}" for k in range(max(speakers, 1))])
+    SegmentStore(starts, ends, labels, names, uris=[name]).write_rttm(rttm_path)
+    return wav_path, rttm_path, len(starts)
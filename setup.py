@@ -84,13 +84,15 @@ except FileNotFoundError:
 
 setup(
     name="local-transcriber",
-    version="0.1",
-    packages=find_packages(),  # ou [""] si pas de packages déclarés
-    py_modules=["transcriber_cli"],
+    version="0.2",
+    packages=find_packages(include=["transcriber", "transcriber.*"]),
     install_requires=install_requires,
     entry_points={
         "console_scripts": [
-            "transcriber = transcriber_cli:main"
+            "transcriber = transcriber.cli:main",
+            "transcriber-diarize = transcriber.diarize:main",
+            "transcriber-transcribe = transcriber.transcribe_segments:main",
+            "transcriber-run = transcriber.run_all:main",
         ]
     },
 )    
@@ -0,0 +1,4 @@
+# Transcription multilocuteur locale (pyannote + Whisper).
+# Les modules lourds (torch, whisper, pyannote) ne sont importés qu'à l'usage.
+
+__version__ = "0.2"
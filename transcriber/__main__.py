@@ -0,0 +1,4 @@
+# `python -m transcriber` : transcription des paires .wav / .rttm
+from transcriber.cli import main
+
+main()
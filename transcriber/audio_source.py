@@ -0,0 +1,116 @@
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from transcriber.defaults import SAMPLE_RATE
+
+
+# === LOCALISATION DU BLOC PCM DANS UN WAV ===
+def _find_wav_data(wav_path):
+    # Parcourt les chunks RIFF pour trouver le format et l'offset des données PCM
+    # (ffmpeg insère parfois un chunk LIST avant "data").
+    with open(wav_path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                audio_format, channels, rate, _, _, bits = fmt
+                return {
+                    "format": audio_format,
+                    "channels": channels,
+                    "rate": rate,
+                    "bits": bits,
+                    "offset": f.tell(),
+                    "size": chunk_size,
+                }
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+# === EMPREINTE DU CONTENU AUDIO ===
+def _format_tag(audio_format, channels, rate, bits):
+    return f"{audio_format}:{channels}:{rate}:{bits}".encode()
+
+
+def audio_hash(wav_path, chunk_size=1 << 20):
+    # SHA-256 des seuls échantillons PCM (et du format) : deux conversions
+    # ffmpeg du même audio donnent la même empreinte malgré les métadonnées.
+    info = _find_wav_data(wav_path)
+    digest = hashlib.sha256()
+    with open(wav_path, "rb") as f:
+        if info:
+            digest.update(_format_tag(info["format"], info["channels"], info["rate"], info["bits"]))
+            f.seek(info["offset"])
+            remaining = info["size"]
+        else:
+            remaining = None
+        while remaining is None or remaining > 0:
+            block = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def pcm_hash(pcm, sample_rate=SAMPLE_RATE):
+    # Même empreinte qu'audio_hash pour le WAV 16 bits mono équivalent
+    digest = hashlib.sha256(_format_tag(1, 1, sample_rate, 16))
+    digest.update(memoryview(np.ascontiguousarray(pcm, dtype="<i2")).cast("B"))
+    return digest.hexdigest()
+
+
+# === SOURCE DE SEGMENTS EN MÉMOIRE ===
+# Audio 16 kHz mono décodé une seule fois ; chaque segment RTTM est une vue NumPy.
+class SegmentSource:
+    def __init__(self, audio, sample_rate=SAMPLE_RATE):
+        self.audio = np.ascontiguousarray(audio, dtype=np.float32)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_wav(cls, wav_path, chunk_samples=SAMPLE_RATE * 60):
+        info = _find_wav_data(wav_path)
+        if not info or (info["format"], info["channels"], info["rate"], info["bits"]) != (1, 1, SAMPLE_RATE, 16):
+            # Format inattendu : un seul décodage ffmpeg pour tout le fichier
+            import whisper
+            return cls(whisper.load_audio(wav_path))
+
+        # Projection mémoire du PCM int16 puis conversion float32 par blocs,
+        # sans copie intermédiaire du fichier complet.
+        n_samples = min(info["size"], os.path.getsize(wav_path) - info["offset"]) // 2
+        pcm = np.memmap(wav_path, dtype="<i2", mode="r", offset=info["offset"], shape=(n_samples,))
+        return cls.from_pcm(pcm, chunk_samples)
+
+    @classmethod
+    def from_pcm(cls, pcm, chunk_samples=SAMPLE_RATE * 60):
+        audio = np.empty(len(pcm), dtype=np.float32)
+        for i in range(0, len(pcm), chunk_samples):
+            np.multiply(pcm[i:i + chunk_samples], 1 / 32768.0, out=audio[i:i + chunk_samples], casting="unsafe")
+        return cls(audio)
+
+    @property
+    def duration(self):
+        return len(self.audio) / self.sample_rate
+
+    def slice(self, start, end):
+        # Vue (sans copie) sur l'intervalle [start, end] en secondes
+        first = min(max(int(round(start * self.sample_rate)), 0), len(self.audio))
+        last = min(max(int(round(end * self.sample_rate)), first), len(self.audio))
+        return self.audio[first:last]
+
+    def segment(self, segment):
+        return self.slice(segment.start, segment.end)
@@ -0,0 +1,125 @@
+import time
+
+import torch
+from whisper.audio import N_FRAMES, N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+from whisper.decoding import DecodingOptions
+from whisper.tokenizer import get_tokenizer
+
+from transcriber.defaults import BATCH_SECONDS, BATCH_SIZE
+from transcriber.metrics import METRICS
+
+# Seuils par défaut de whisper.transcribe, pour reproduire le même texte
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+# === DÉCOUPAGE EN LOTS ===
+def make_batches(chunks, batch_size=BATCH_SIZE, batch_seconds=BATCH_SECONDS):
+    # Regroupe les segments audio reçus au fil de l'eau ; un lot est limité
+    # en nombre de segments et en durée audio cumulée (un segment seul passe
+    # toujours). Seul le lot en cours est gardé en mémoire.
+    batch, batch_duration = [], 0.0
+    for audio in chunks:
+        duration = len(audio) / SAMPLE_RATE
+        if batch and (len(batch) >= batch_size or batch_duration + duration > batch_seconds):
+            yield batch
+            batch, batch_duration = [], 0.0
+        batch.append(audio)
+        batch_duration += duration
+    if batch:
+        yield batch
+
+
+# === MOTEUR DE TRANSCRIPTION PAR LOTS ===
+# Mel calculés segment par segment, empilés, un passage d'encodeur et un
+# décodage glouton par lot. Les segments que whisper.transcribe traiterait
+# autrement (plus de 30 s, repli en température, fenêtre inachevée) repassent
+# par model.transcribe pour garder un texte identique.
+class BatchTranscriber:
+    def __init__(self, model, language, batch_size=BATCH_SIZE, batch_seconds=BATCH_SECONDS):
+        self.model = model
+        self.language = language
+        self.batch_size = max(1, batch_size)
+        self.batch_seconds = batch_seconds
+        self.tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=language,
+            task="transcribe",
+        )
+        self.options = DecodingOptions(language=language, temperature=0.0, fp16=False)
+
+    def _transcribe_one(self, audio):
+        METRICS.count("whisper_calls_total", mode="sequential")
+        return self.model.transcribe(audio, language=self.language, fp16=False)["text"].strip()
+
+    def _segment_mel(self, audio):
+        # Même préparation que whisper.transcribe pour la première fenêtre
+        mel = log_mel_spectrogram(audio, self.model.dims.n_mels, padding=N_SAMPLES)
+        content_frames = mel.shape[-1] - N_FRAMES
+        return pad_or_trim(mel[:, :content_frames], N_FRAMES)
+
+    def _needs_fallback(self, result):
+        if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+            needs_fallback = True
+        else:
+            needs_fallback = result.avg_logprob < LOGPROB_THRESHOLD
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            needs_fallback = False  # silence
+        if needs_fallback:
+            return True
+
+        # Deux timestamps consécutifs sans timestamp final : transcribe
+        # relancerait une fenêtre à partir du dernier timestamp.
+        tokens = torch.tensor(result.tokens)
+        timestamp_tokens = tokens.ge(self.tokenizer.timestamp_begin)
+        single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+        consecutive = torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0]
+        return len(consecutive) > 0 and not single_timestamp_ending
+
+    def _is_silence(self, result):
+        return result.no_speech_prob > NO_SPEECH_THRESHOLD and not result.avg_logprob > LOGPROB_THRESHOLD
+
+    def _transcribe_batch(self, chunks):
+        texts = [None] * len(chunks)
+        batched = [i for i, audio in enumerate(chunks) if len(audio) <= N_SAMPLES]
+        for i in range(len(chunks)):
+            if len(chunks[i]) > N_SAMPLES:
+                texts[i] = self._transcribe_one(chunks[i])
+        if not batched:
+            return texts
+
+        mel = torch.stack([self._segment_mel(chunks[i]) for i in batched]).to(self.model.device)
+        METRICS.count("whisper_calls_total", mode="batch")
+        results = self.model.decode(mel, self.options)
+        for i, result in zip(batched, results):
+            if self._needs_fallback(result):
+                METRICS.count("whisper_fallbacks_total")
+                texts[i] = self._transcribe_one(chunks[i])
+            elif self._is_silence(result):
+                texts[i] = ""
+            else:
+                texts[i] = result.text.strip()
+        return texts
+
+    def iter_texts(self, chunks):
+        # Textes dans l'ordre des segments, calculés lot par lot ; `chunks`
+        # peut être un générateur, consommé un lot à la fois. La latence d'un
+        # lot est répartie entre ses segments.
+        if self.batch_size == 1:
+            batches = ([audio] for audio in chunks)
+        else:
+            batches = make_batches(chunks, self.batch_size, self.batch_seconds)
+        for batch in batches:
+            start = time.perf_counter()
+            if self.batch_size == 1:
+                texts = [self._transcribe_one(batch[0])]
+            else:
+                texts = self._transcribe_batch(batch)
+            elapsed = time.perf_counter() - start
+            METRICS.observe("stage_seconds", elapsed, stage="inference")
+            for _ in batch:
+                METRICS.observe("segment_latency_seconds", elapsed / len(batch))
+            METRICS.count("segments_total", len(batch))
+            yield from texts
@@ -0,0 +1,110 @@
+import argparse
+import os
+import time
+
+from transcriber import metrics
+from transcriber.defaults import (
+    BATCH_SECONDS, BATCH_SIZE, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, MAX_SEGMENT_DURATION, MERGE_GAP,
+    MIN_SEGMENT_DURATION,
+    OUTPUT_FORMATS, VAD_MARGIN_DB, VAD_MIN_SPEECH, VAD_PADDING, VAD_THRESHOLD_DB, VAD_ZCR_THRESHOLD
+)
+from transcriber.transcript_writer import parse_formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription audio multilocuteur avec Whisper + RTTM")
+    parser.add_argument("--input", type=str, default="output", help="Répertoire contenant .wav et .rttm")
+    parser.add_argument("--output", type=str, default="transcripts", help="Répertoire de sortie")
+    parser.add_argument("--model", type=str, default="base", help="Modèle Whisper à utiliser")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Nombre maximal de segments par lot Whisper (1 = segment par segment)")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS, help="Durée audio cumulée maximale par lot (secondes)")
+    parser.add_argument("--merge-gap", type=float, default=MERGE_GAP, help="Fusionne les tours consécutifs d'un même locuteur séparés de moins de N secondes (0 = désactivé)")
+    parser.add_argument("--max-segment", type=float, default=MAX_SEGMENT_DURATION, help="Durée maximale d'un segment fusionné (secondes)")
+    parser.add_argument("--min-segment", type=float, default=MIN_SEGMENT_DURATION, help="Rattache au tour voisin le plus proche les fragments isolés plus courts que N secondes (0 = désactivé)")
+    parser.add_argument("--single-pass", action="store_true", help="Transcrit chaque fichier en une passe et attribue chaque mot à un locuteur")
+    parser.add_argument("--cpu-optimized", action="store_true", help="CPU : couches linéaires de Whisper quantifiées en int8 (mises en cache) et threads torch ajustés aux cœurs physiques")
+    parser.add_argument("--shared-weights", action="store_true", help="CPU : poids Whisper convertis une fois (dans --cache-dir) puis projetés en mémoire, partagés entre processus et chargés quasi instantanément")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus de transcription en parallèle (CPU)")
+    parser.add_argument("--cache-dir", type=str, default=os.getenv("CACHE_FOLDER", DEFAULT_CACHE_DIR), help="Dossier du cache de transcriptions")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB, help="Taille maximale du cache de transcriptions (Mo)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache de transcriptions")
+    parser.add_argument("--vad", action="store_true", help="Rogne les silences en bord de segment et ignore les segments sans parole avant Whisper")
+    parser.add_argument("--vad-threshold", type=float, default=VAD_THRESHOLD_DB, help="Énergie minimale d'une trame de parole (dB pleine échelle)")
+    parser.add_argument("--vad-margin", type=float, default=VAD_MARGIN_DB, help="Écart minimal au plancher de bruit du fichier (dB)")
+    parser.add_argument("--vad-zcr", type=float, default=VAD_ZCR_THRESHOLD, help="Taux de passage par zéro au-delà duquel une trame plus faible compte comme parole (fricatives)")
+    parser.add_argument("--vad-padding", type=float, default=VAD_PADDING, help="Marge conservée autour de la parole détectée (secondes)")
+    parser.add_argument("--vad-min-speech", type=float, default=VAD_MIN_SPEECH, help="Parole minimale pour transcrire un segment (secondes)")
+    parser.add_argument("--vad-debug", action="store_true", help="Écrit <nom>.vad.rttm avec les zones retirées par le VAD")
+    parser.add_argument("--formats", type=parse_formats, default=",".join(OUTPUT_FORMATS), help="Formats de transcription écrits au fil de l'eau, séparés par des virgules (txt, jsonl, srt, vtt)")
+    metrics.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    # Imports lourds (torch, whisper, pyannote) après l'analyse des arguments
+    from transcriber.cpu_inference import load_model, text_variant, tune_threads
+    from transcriber.scheduler import TranscriptionPlan, device_label, load_cost_model
+    from transcriber.transcript_cache import TranscriptCache
+    from transcriber.transcription import transcribe_file
+    from transcriber.vad import VoiceActivityFilter
+    from transcriber.workers import get_duration, run_workers
+
+    os.makedirs(args.output, exist_ok=True)
+    files = [f for f in os.listdir(args.input) if f.endswith(".rttm")]
+    options = {
+        "batch_size": args.batch_size,
+        "batch_seconds": args.batch_seconds,
+        "merge_gap": args.merge_gap,
+        "max_segment": args.max_segment,
+        "min_segment": args.min_segment,
+        "single_pass": args.single_pass,
+        "model_name": text_variant(args.model, cpu_optimized=args.cpu_optimized),
+        "cache": None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size * 1024 ** 2),
+        "vad": VoiceActivityFilter(
+            args.vad_threshold, args.vad_margin, args.vad_zcr, args.vad_padding, args.vad_min_speech, args.vad_debug
+        ) if args.vad else None,
+        "formats": args.formats,
+    }
+
+    jobs = []
+    for rttm_file in files:
+        base = rttm_file.replace(".rttm", "")
+        wav_file = os.path.join(args.input, base + ".wav")
+        rttm_path = os.path.join(args.input, rttm_file)
+
+        if os.path.exists(wav_file):
+            jobs.append((wav_file, rttm_path, args.output, get_duration(wav_file)))
+        else:
+            print(f"❌ Fichier WAV manquant pour {base}")
+
+    # Coût prévu de chaque fichier d'après les mesures passées ; les plus
+    # coûteux d'abord, pour ne pas finir sur un seul gros fichier
+    cost_model = load_cost_model(args.cache_dir)
+    device = device_label(cpu_optimized=args.cpu_optimized, workers=args.workers)
+    plan = TranscriptionPlan(jobs, cost_model, args.model, device, args.workers)
+    jobs = plan.jobs
+
+    start_time = time.time()
+    with metrics.MetricsSession(args):
+        try:
+            if args.workers > 1:
+                run_workers(jobs, args.model, args.workers, options, args.cpu_optimized, args.cache_dir,
+                            on_progress=plan.eta.update, on_done=plan.done, shared_weights=args.shared_weights)
+            else:
+                if args.cpu_optimized:
+                    print(f"🧵 {tune_threads()} threads torch")
+                model = load_model(args.model, cpu_optimized=args.cpu_optimized, cache_dir=args.cache_dir,
+                                   shared_weights=args.shared_weights)
+                for job in jobs:
+                    wav_file, rttm_path, output_path, _ = job
+                    job_start = time.time()
+                    transcribe_file(wav_file, rttm_path, output_path, model, progress=plan.progress(job), **options)
+                    plan.done(job, time.time() - job_start)
+        finally:
+            cost_model.save()
+
+    elapsed = time.time() - start_time
+    audio_hours = sum(job[3] for job in jobs) / 3600
+    print(f"\n⚡ Débit : {audio_hours:.2f} h audio en {elapsed / 3600:.2f} h → {audio_hours * 3600 / max(elapsed, 1e-6):.1f} h audio / h")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
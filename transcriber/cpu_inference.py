@@ -0,0 +1,188 @@
+import os
+import time
+from dataclasses import asdict
+
+import torch
+import whisper
+from whisper.model import AudioEncoder, Linear, ModelDimensions, TextDecoder, Whisper
+
+from transcriber.defaults import DEFAULT_CACHE_DIR
+from transcriber.metrics import METRICS
+
+
+# === THREADS TORCH ===
+def physical_cores():
+    # Cœurs physiques : l'hyperthreading n'aide pas les GEMM int8/fp32
+    import psutil
+    return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+
+def tune_threads(workers=1):
+    # Les cœurs sont partagés entre les workers ; un seul thread inter-op,
+    # le décodage Whisper étant séquentiel d'un jeton à l'autre.
+    threads = max(1, physical_cores() // max(1, workers))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # déjà fixé, ou travail parallèle déjà lancé dans ce processus
+    return threads
+
+
+# === QUANTIFICATION INT8 DYNAMIQUE ===
+# Les couches linéaires passent en int8 ; les activations restent en float32
+# et sont quantifiées à la volée. whisper.model.Linear ne fait que convertir
+# ses poids au type de l'entrée : en float32 elle équivaut à nn.Linear, la
+# seule classe acceptée par quantize_dynamic.
+def quantize(model):
+    for module in model.modules():
+        if type(module) is Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantized_path(cache_dir, model_name):
+    # Poids compactés propres au moteur int8 et aux versions de torch/Whisper
+    engine = torch.backends.quantized.engine
+    return os.path.join(
+        cache_dir, "models",
+        f"{os.path.basename(model_name)}-int8-{engine}-torch{torch.__version__}-whisper{whisper.__version__}-weights.pt"
+    )
+
+
+def _quantized_skeleton(dims):
+    # Whisper sans poids dont les couches linéaires sont déjà des couches
+    # int8 dynamiques (poids nuls) : le state_dict enregistré s'y charge
+    # directement, sans modèle fp32 ni quantification.
+    model = _empty_model(dims)
+    for module in list(model.modules()):
+        for name, child in module.named_children():
+            if type(child) is Linear:
+                setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(
+                    child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+                ))
+    return model
+
+
+def load_quantized_model(model_name, cache_dir):
+    # Premier chargement : modèle fp32, quantification puis sauvegarde des
+    # poids int8 (state_dict, relu avec weights_only : aucun code exécuté).
+    # Ensuite ils sont chargés dans un squelette déjà quantifié, sans
+    # checkpoint fp32 ni conversion des couches.
+    path = quantized_path(cache_dir, model_name)
+    start = time.perf_counter()
+    if os.path.exists(path):
+        checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+        model = _quantized_skeleton(ModelDimensions(**checkpoint["dims"]))
+        model.load_state_dict(checkpoint["state_dict"], assign=True)
+        _restore_buffers(model, checkpoint)
+        source = "cache"
+    else:
+        model = quantize(whisper.load_model(model_name, device="cpu"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # workers parallèles au premier lancement
+        torch.save(_checkpoint(model), tmp_path)
+        os.replace(tmp_path, path)
+        source = "quantification"
+    model.eval()
+    METRICS.observe("stage_seconds", time.perf_counter() - start, stage="load", mode="int8")
+    print(f"⚙️ Modèle '{model_name}' int8 prêt ({source}, {time.perf_counter() - start:.1f} s)")
+    return model
+
+
+def text_variant(model_name, device="cpu", cpu_optimized=False):
+    # Nom du modèle dans les clés du cache et du journal : le texte int8
+    # diffère du texte fp32
+    return f"{model_name}-int8" if cpu_optimized and device == "cpu" else model_name
+
+
+# === POIDS PARTAGÉS EN PROJECTION MÉMOIRE ===
+# Les poids fp32 sont écrits une fois dans un fichier torch, puis chaque
+# processus le projette en mémoire (torch.load(mmap=True)) au lieu de lire
+# et copier le checkpoint : les workers lisent les mêmes pages du cache
+# disque, comptées une seule fois, et le démarrage ne coûte que la lecture
+# des pages effectivement utilisées.
+def shared_weights_path(cache_dir, model_name):
+    return os.path.join(
+        cache_dir, "models", f"{os.path.basename(model_name)}-fp32-torch{torch.__version__}-whisper{whisper.__version__}.pt"
+    )
+
+
+def prepare_shared_weights(model_name, cache_dir):
+    # Conversion au premier usage, avant le lancement des workers
+    path = shared_weights_path(cache_dir, model_name)
+    if os.path.exists(path):
+        return path
+    model = whisper.load_model(model_name, device="cpu")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(_checkpoint(model), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _checkpoint(model):
+    # Dimensions, state_dict et tampons non persistants (masque causal,
+    # têtes d'alignement), les tenseurs creux enregistrés en dense
+    persistent = model.state_dict()
+    buffers = {name: buffer for name, buffer in model.named_buffers() if name not in persistent}
+    return {
+        "dims": asdict(model.dims),
+        "state_dict": persistent,
+        "buffers": {name: buffer.to_dense() if buffer.is_sparse else buffer for name, buffer in buffers.items()},
+        "sparse": [name for name, buffer in buffers.items() if buffer.is_sparse],
+    }
+
+
+def _restore_buffers(model, checkpoint):
+    for name, buffer in checkpoint["buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        buffer = buffer.to_sparse() if name in checkpoint["sparse"] else buffer
+        model.get_submodule(module_name).register_buffer(buffer_name, buffer, persistent=False)
+
+
+def _empty_model(dims):
+    # Whisper sans poids : encodeur et décodeur créés sur le périphérique
+    # meta (ni allocation ni initialisation aléatoire). Whisper(dims) n'est
+    # pas utilisable ici : son masque creux n'a pas d'équivalent meta.
+    model = torch.nn.Module.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(dims.n_mels, dims.n_audio_ctx, dims.n_audio_state, dims.n_audio_head, dims.n_audio_layer)
+        model.decoder = TextDecoder(dims.n_vocab, dims.n_text_ctx, dims.n_text_state, dims.n_text_head, dims.n_text_layer)
+    return model
+
+
+def load_shared_model(model_name, cache_dir):
+    start = time.perf_counter()
+    path = prepare_shared_weights(model_name, cache_dir)
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    model = _empty_model(ModelDimensions(**checkpoint["dims"]))
+    # assign=True : les paramètres deviennent les tenseurs projetés, sans copie
+    model.load_state_dict(checkpoint["state_dict"], assign=True)
+    _restore_buffers(model, checkpoint)
+    model.eval()
+    METRICS.observe("stage_seconds", time.perf_counter() - start, stage="load", mode="mmap")
+    print(f"⚙️ Modèle '{model_name}' projeté en mémoire ({time.perf_counter() - start:.1f} s)")
+    return model
+
+
+def memory_usage_mb():
+    # USS : mémoire propre au processus ; les pages partagées (poids
+    # projetés) n'y figurent pas, contrairement au RSS.
+    import psutil
+    info = psutil.Process().memory_full_info()
+    return info.uss / 1024 ** 2, info.rss / 1024 ** 2
+
+
+def load_model(model_name, device="cpu", cpu_optimized=False, cache_dir=DEFAULT_CACHE_DIR, shared_weights=False):
+    if cpu_optimized and device == "cpu":
+        if shared_weights:
+            print("⚠️ --shared-weights ignoré avec --cpu-optimized (poids int8 compactés, non projetables).")
+        return load_quantized_model(model_name, cache_dir)
+    if cpu_optimized:
+        print("⚠️ --cpu-optimized ignoré sur GPU.")
+    if shared_weights and device == "cpu":
+        return load_shared_model(model_name, cache_dir)
+    return whisper.load_model(model_name, device=device)
@@ -0,0 +1,58 @@
+import os
+
+# Valeurs par défaut partagées par les CLI. Ce module ne dépend que de la
+# bibliothèque standard : argparse peut s'exécuter sans importer torch.
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = (".m4a", ".mp3", ".wav", ".mp4", ".mov", ".mkv", ".avi")
+
+MODEL_MAP = {
+    "1": "tiny", "2": "base", "3": "small",
+    "4": "medium", "5": "large", "6": "large-v3"
+}
+
+# Lots Whisper
+BATCH_SIZE = 16
+BATCH_SECONDS = 240.0
+
+# Planification des segments (fenêtre Whisper de 30 s, avec une marge pour les bords).
+# Fusion des tours proches et rattachement des fragments courts : sur demande
+# (--merge-gap 0.5 --min-segment 0.3 par exemple), 0 = tours de la diarisation
+MAX_SEGMENT_DURATION = 28.0
+MERGE_GAP = 0.0
+MIN_SEGMENT_DURATION = 0.0
+
+# Cache local
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "local-transcriber")
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# Diarisation par fenêtres
+DEFAULT_WINDOW_OVERLAP = 30.0
+# Distance cosinus maximale pour rattacher un locuteur local à un locuteur global
+DEFAULT_STITCH_THRESHOLD = 0.7
+
+# Filtre de parole (VAD) avant Whisper : énergie en dB relatifs à la pleine échelle
+VAD_THRESHOLD_DB = -50.0
+VAD_MARGIN_DB = 12.0
+VAD_ZCR_THRESHOLD = 0.25
+VAD_PADDING = 0.2
+VAD_MIN_SPEECH = 0.2
+
+# Mode surveillance : scrutation du dossier d'entrée (sans inotify) et délai
+# sans modification avant de considérer un fichier comme entièrement écrit
+WATCH_INTERVAL = 1.0
+WATCH_SETTLE = 2.0
+
+# Modèle de coût : mesures conservées par étape/modèle/matériel, facteurs
+# temps réel appliqués sans historique, fréquence d'affichage du temps restant
+COST_HISTORY_SIZE = 200
+DEFAULT_RTF = {"convert": 0.02, "diarize": 1.3, "transcribe": 1.0}
+ETA_INTERVAL = 10.0
+
+# Formats de transcription écrits par défaut (txt, jsonl, srt, vtt)
+OUTPUT_FORMATS = ("txt",)
+
+# Mode distribué (--shared) : durée d'un bail sans renouvellement avant
+# reprise par un autre worker, et attente entre deux recherches de travail
+QUEUE_LEASE = 60.0
+QUEUE_POLL = 5.0
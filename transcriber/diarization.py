@@ -0,0 +1,193 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import wave
+
+import numpy as np
+
+from transcriber.audio_source import audio_hash, pcm_hash
+from transcriber.defaults import AUDIO_EXTENSIONS, SAMPLE_RATE
+from transcriber.metrics import METRICS
+from transcriber.windowed_diarization import WindowedDiarizer
+
+
+# === CHARGEMENT DU PIPELINE PYANNOTE ===
+def load_pipeline(gpu=False):
+    import torch
+    from pyannote.audio import Pipeline
+
+    hf_token = os.environ.get("HUGGINGFACE_TOKEN")
+    assert hf_token, "⚠️ Le token Hugging Face est manquant (HUGGINGFACE_TOKEN)."
+    device = torch.device("cuda" if gpu and torch.cuda.is_available() else "cpu")
+    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization", use_auth_token=hf_token)
+    pipeline.to(device)  # Déplacement explicite du pipeline vers le périphérique
+    return pipeline, device
+
+
+# === LISTAGE ET NORMALISATION DES FICHIERS D'ENTRÉE ===
+def list_input_files(input_folder):
+    input_files = [f for f in os.listdir(input_folder) if f.lower().endswith(AUDIO_EXTENSIONS)]
+    normalized_files = []
+    for filename in input_files:
+        normalized_name = filename.replace(" ", "_")  # Remplace les espaces par des underscores
+        if filename != normalized_name:
+            try:
+                os.rename(os.path.join(input_folder, filename), os.path.join(input_folder, normalized_name))
+            except FileNotFoundError:
+                # Déjà renommé (ou traité) par un autre worker du dossier partagé
+                continue
+        normalized_files.append(normalized_name)
+    return normalized_files
+
+
+# === CONVERSION EN WAV 16 kHz MONO ===
+def convert_to_wav(input_path, wav_path):
+    with METRICS.timer("convert"):
+        subprocess.run([
+            "ffmpeg", "-y", "-i", input_path,
+            "-ac", "1", "-ar", "16000", "-sample_fmt", "s16",
+            wav_path
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+# === DÉCODAGE EN FLUX SANS WAV INTERMÉDIAIRE ===
+def probe_duration(input_path):
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", input_path
+    ], capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def decode_audio(input_path):
+    with METRICS.timer("convert", mode="stream"):
+        return _decode_audio(input_path)
+
+
+def _decode_audio(input_path):
+    # ffmpeg écrit du s16le 16 kHz mono sur stdout, lu directement dans un
+    # tampon int16 préalloué d'après la durée annoncée par ffprobe.
+    estimated = probe_duration(input_path) or 60.0
+    pcm = np.empty(int(estimated * SAMPLE_RATE) + SAMPLE_RATE, dtype=np.int16)
+    process = subprocess.Popen([
+        "ffmpeg", "-nostdin", "-i", input_path,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-loglevel", "error", "-"
+    ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    filled = 0
+    with process.stdout:
+        while True:
+            if filled == pcm.nbytes:
+                # Durée sous-estimée : on double le tampon
+                grown = np.empty(len(pcm) * 2, dtype=np.int16)
+                grown[:len(pcm)] = pcm
+                pcm = grown
+            read = process.stdout.readinto(memoryview(pcm).cast("B")[filled:])
+            if not read:
+                break
+            filled += read
+    if process.wait() != 0:
+        raise RuntimeError(f"Échec du décodage ffmpeg pour {input_path}")
+    return pcm[:filled // 2]
+
+
+def pipeline_input(pcm, uri=None):
+    # Forme d'onde en mémoire acceptée par pyannote
+    import torch
+
+    waveform = torch.from_numpy(pcm.astype(np.float32) / 32768.0).unsqueeze(0)
+    audio = {"waveform": waveform, "sample_rate": SAMPLE_RATE}
+    if uri:
+        audio["uri"] = uri
+    return audio
+
+
+def write_wav(pcm, wav_path):
+    tmp_path = f"{wav_path}.tmp"
+    with wave.open(tmp_path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(memoryview(pcm).cast("B"))
+    os.replace(tmp_path, wav_path)
+
+
+def write_wav_in_background(pcm, wav_path):
+    thread = threading.Thread(target=write_wav, args=(pcm, wav_path), daemon=True)
+    thread.start()
+    return thread
+
+
+# === DURÉE DU FICHIER AUDIO ===
+def get_duration(wav_file):
+    with wave.open(wav_file, "rb") as wf:
+        frames = wf.getnframes()
+        rate = wf.getframerate()
+        return round(frames / float(rate), 2)
+
+
+# === DIARISATION ET SAUVEGARDE DU RTTM ===
+def diarizer_key(pipeline):
+    # Modèles du pipeline et, en diarisation fenêtrée, fenêtre, recouvrement
+    # et seuil de raccordement : tout ce qui change le RTTM d'un même audio
+    windowing = None
+    if isinstance(pipeline, WindowedDiarizer):
+        windowing = f"w{pipeline.window:g}-o{pipeline.overlap:g}-s{pipeline.threshold:g}"
+        pipeline = pipeline.pipeline
+    model = (
+        type(pipeline).__name__,
+        str(getattr(pipeline, "segmentation_model", None)),
+        str(getattr(pipeline, "embedding", None)),
+    )
+    model_key = hashlib.sha256(repr(model).encode()).hexdigest()[:12]
+    return f"{model_key}-{windowing}" if windowing else model_key
+
+
+def diarize_to_rttm(pipeline, audio, rttm_path, cache=None, audio_key=None, options=None, variant=None, refresh=False):
+    # `audio` : chemin du WAV ou tampon PCM int16 décodé en flux ;
+    # `pipeline` : pipeline pyannote ou WindowedDiarizer ; `options` : nombre
+    # de locuteurs transmis au pipeline, `variant` : réglage du clustering.
+    # La clé du RTTM en cache réunit empreinte audio, modèle, fenêtrage et
+    # réglage du clustering. Renvoie None si le RTTM vient du cache : le
+    # pipeline n'est alors pas exécuté. `refresh` force la diarisation (le
+    # résultat est nécessaire, par exemple pour une comparaison).
+    in_memory = isinstance(audio, np.ndarray)
+    options = options or {}
+    if cache and audio_key is None:
+        audio_key = pcm_hash(audio) if in_memory else audio_hash(audio)
+    rttm_key = "-".join(part for part in (audio_key, diarizer_key(pipeline), variant) if part)
+    if cache and not refresh and cache.restore_rttm(rttm_key, rttm_path):
+        METRICS.count("rttm_cache_hits_total")
+        return None
+    uri = os.path.splitext(os.path.basename(rttm_path))[0]
+    with METRICS.timer("diarize"):
+        if isinstance(pipeline, WindowedDiarizer):
+            # Lecture fenêtre par fenêtre, sans charger tout l'audio en float32
+            diarization = pipeline(audio, uri=uri, audio_key=audio_key, **options)
+        else:
+            # L'empreinte accompagne l'audio pour le cache des embeddings
+            file = pipeline_input(audio, uri) if in_memory else {"audio": audio, "uri": uri}
+            if audio_key:
+                file["audio_key"] = audio_key
+            diarization = pipeline(file, **options)
+    with METRICS.timer("write"):
+        # Écriture atomique : un RTTM présent est complet (mode --shared)
+        tmp_path = f"{rttm_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            diarization.write_rttm(f)
+        os.replace(tmp_path, rttm_path)
+    if cache:
+        cache.store_rttm(rttm_key, rttm_path)
+    return diarization
+
+
+# === ARCHIVAGE DU FICHIER ORIGINAL ===
+def archive_input(input_path, archived_folder):
+    archived_path = os.path.join(archived_folder, os.path.basename(input_path))
+    shutil.move(input_path, archived_path)
+    return archived_path
@@ -0,0 +1,267 @@
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from transcriber import metrics
+from transcriber.defaults import (
+    DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, DEFAULT_STITCH_THRESHOLD, DEFAULT_WINDOW_OVERLAP, QUEUE_LEASE, SAMPLE_RATE
+)
+
+# === SPINNER ANIMÉ POUR PATIENTER ===
+def spinning_cursor(message="⏳ Traitement..."):
+    spinner = itertools.cycle(['|', '/', '-', '\\'])
+    while not getattr(threading.current_thread(), "stop", False):
+        sys.stdout.write(f'\r{message} ' + next(spinner))
+        sys.stdout.flush()
+        time.sleep(0.1)
+
+
+def main():
+    # Charger les variables d'environnement depuis .env
+    from dotenv import load_dotenv
+    load_dotenv()
+    default_input = os.getenv("INPUT_FOLDER", "input")
+    default_output = os.getenv("OUTPUT_FOLDER", "output")
+
+    # === PARSEUR D'ARGUMENTS CLI ===
+    parser = argparse.ArgumentParser(description="Diarisation audio avec Pyannote")
+    parser.add_argument("--gpu", action="store_true", help="Force l'utilisation du GPU pour Pyannote")
+    parser.add_argument("--input", type=str, default=default_input, help="Dossier contenant les fichiers audio à traiter")
+    parser.add_argument("--output", type=str, default=default_output, help="Dossier où enregistrer les fichiers traités")
+    parser.add_argument("--cache-dir", type=str, default=os.getenv("CACHE_FOLDER", DEFAULT_CACHE_DIR), help="Dossier du cache (RTTM par empreinte audio)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB, help="Taille maximale du cache des segmentations et embeddings (Mo)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache des RTTM")
+    parser.add_argument("--stream", action="store_true", help="Décode l'audio en flux vers la mémoire (sans relire de WAV) ; le WAV est écrit en arrière-plan")
+    parser.add_argument("--window", type=float, default=0, help="Diarisation par fenêtres de N secondes à mémoire bornée (0 = fichier entier)")
+    parser.add_argument("--window-overlap", type=float, default=DEFAULT_WINDOW_OVERLAP, help="Recouvrement entre fenêtres de diarisation (secondes)")
+    parser.add_argument("--stitch-threshold", type=float, default=DEFAULT_STITCH_THRESHOLD, help="Distance cosinus maximale pour relier un locuteur d'une fenêtre à un locuteur connu")
+    parser.add_argument("--num-speakers", type=int, default=None, help="Nombre de locuteurs connu")
+    parser.add_argument("--min-speakers", type=int, default=None, help="Nombre minimal de locuteurs")
+    parser.add_argument("--max-speakers", type=int, default=None, help="Nombre maximal de locuteurs")
+    parser.add_argument("--clustering-threshold", type=float, default=None, help="Seuil du clustering des locuteurs pyannote (défaut du modèle sinon)")
+    parser.add_argument("--recluster", action="store_true", help="Rediarise les WAV déjà présents dans --output avec les réglages ci-dessus ; segmentation et embeddings sont repris du cache")
+    parser.add_argument("--shared", action="store_true", help="Mode distribué : plusieurs workers (machines ou processus) se partagent --input/--output via des baux dans <output>/.claims")
+    parser.add_argument("--lease", type=float, default=QUEUE_LEASE, help="Avec --shared, délai sans signe de vie avant reprise d'un fichier par un autre worker (secondes)")
+    parser.add_argument("--compare-whole", action="store_true", help="Avec --window, compare au fichier entier (DER et pic mémoire)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    with metrics.MetricsSession(args):
+        if args.recluster:
+            recluster_folder(args)
+        else:
+            diarize_folder(args)
+
+
+def load_diarizer(args):
+    # Pipeline pyannote (+ cache des embeddings, réglages du clustering) et
+    # options d'appel ; renvoie aussi le libellé du périphérique.
+    from transcriber.diarization import load_pipeline
+    from transcriber.embedding_cache import (
+        EmbeddingCache, clustering_options, clustering_variant, set_clustering_threshold
+    )
+    from transcriber.windowed_diarization import WindowedDiarizer
+
+    print("\n🔁 Initialisation du modèle de diarisation (pyannote)...")
+    pipeline, device = load_pipeline(args.gpu)
+    if not args.no_cache and EmbeddingCache(args.cache_dir, args.cache_size * 1024 ** 2).install(pipeline):
+        print("💾 Segmentations et embeddings mis en cache par empreinte audio.")
+    if set_clustering_threshold(pipeline, args.clustering_threshold):
+        print(f"🎛️ Seuil de clustering : {args.clustering_threshold:g}")
+    options = clustering_options(args.num_speakers, args.min_speakers, args.max_speakers)
+    variant = clustering_variant(options, args.clustering_threshold)
+    diarizer = WindowedDiarizer(pipeline, args.window, args.window_overlap, args.stitch_threshold) if args.window else pipeline
+    print(f"✅ Modèle chargé avec succès sur {device}.")
+    return pipeline, diarizer, device, options, variant
+
+
+def recluster_folder(args):
+    # Nouveau RTTM pour chaque WAV de --output : avec le cache, seul le
+    # clustering est recalculé (quelques secondes par fichier).
+    from transcriber.diarization import diarize_to_rttm
+    from transcriber.transcript_cache import TranscriptCache
+
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir)
+    _, diarizer, _, options, variant = load_diarizer(args)
+    wav_files = sorted(f for f in os.listdir(args.output) if f.endswith(".wav"))
+    if not wav_files:
+        print(f"\n⚠️ Aucun fichier WAV dans '{args.output}/' à rediariser.")
+        return
+    for filename in wav_files:
+        wav_path = os.path.join(args.output, filename)
+        rttm_path = os.path.join(args.output, os.path.splitext(filename)[0] + ".rttm")
+        start = time.time()
+        diarization = diarize_to_rttm(diarizer, wav_path, rttm_path, cache, options=options, variant=variant)
+        if diarization is None:
+            print(f"💾 {filename} : RTTM repris du cache (mêmes réglages) → {rttm_path}")
+        else:
+            print(f"🔁 {filename} : {len(diarization.labels())} locuteur(s) en {time.time() - start:.1f} s → {rttm_path}")
+
+
+def diarize_folder(args):
+    # Imports lourds (torch, pyannote) après l'analyse des arguments
+    from transcriber.diarization import (
+        archive_input, convert_to_wav, decode_audio, diarize_to_rttm, get_duration, list_input_files, probe_duration,
+        write_wav_in_background
+    )
+    from transcriber.scheduler import count_segments, format_duration, load_cost_model, order_by_cost
+    from transcriber.transcript_cache import TranscriptCache
+    from transcriber.windowed_diarization import PeakMemory, compare_with_whole_file
+
+    # === CONFIGURATION ===
+    input_folder = args.input
+    output_folder = args.output
+    archived_folder = os.path.join(output_folder, "archived")  # Créer archived dans output
+    os.makedirs(output_folder, exist_ok=True)
+    os.makedirs(archived_folder, exist_ok=True)
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir)
+    # Par fenêtres, l'audio est lu fenêtre par fenêtre depuis le WAV : un
+    # décodage en flux garderait tout le PCM en mémoire
+    stream = args.stream and not args.window
+    if args.stream and args.window:
+        print("⚠️ --stream ignoré avec --window : les fenêtres sont lues depuis le WAV (mémoire constante).")
+
+    # === INITIALISATION DU PIPELINE PYANNOTE ===
+    pipeline, diarizer, device, options, variant = load_diarizer(args)
+    # Temps de diarisation prévu d'après les mesures passées sur ce matériel
+    cost_model = load_cost_model(args.cache_dir)
+    model_name = f"pyannote-w{args.window:g}" if args.window else "pyannote"
+
+    def process(filename, header):
+        base_name = os.path.splitext(filename)[0]
+        input_path = os.path.join(input_folder, filename)
+        wav_path = os.path.join(output_folder, f"{base_name}.wav")
+        rttm_path = os.path.join(output_folder, f"{base_name}.rttm")
+
+        print(f"\n================= {header} =================")
+        print(f"🗂️  Fichier : {filename}")
+        print(f"🕒 Début : {datetime.now().strftime('%H:%M:%S')}")
+        sampler = metrics.ResourceSampler()
+        sampler.start()
+
+        wav_writer = None
+        if stream:
+            # === 1. DÉCODAGE EN FLUX ===
+            print("🎧 Étape 1 - Décodage en flux (ffmpeg → mémoire)...")
+            audio = decode_audio(input_path)
+            duration = round(len(audio) / SAMPLE_RATE, 2)
+            # Le WAV ne sert qu'à la transcription : écrit en parallèle de la diarisation
+            wav_writer = write_wav_in_background(audio, wav_path)
+            print("✅ Décodage terminé.")
+        else:
+            # === 1. CONVERSION EN WAV ===
+            print("🎧 Étape 1 - Conversion en WAV...")
+            convert_to_wav(input_path, wav_path)
+            print("✅ Conversion terminée.")
+            audio = wav_path
+            duration = get_duration(wav_path)
+
+        print(f"🕓 Durée audio : {int(duration // 60)} min {int(duration % 60)} sec")
+        est_time = cost_model.predict("diarize", model_name, str(device), duration)
+        print(f"⏱️ Estimation du temps de traitement : ~{format_duration(est_time)}")
+
+        # === 2. DIARISATION AVEC SPINNER ===
+        print("🧠 Étape 2 - Diarisation en cours...")
+
+        spinner_thread = threading.Thread(target=spinning_cursor, args=("⏳ Analyse des voix en cours...",))
+        spinner_thread.start()
+
+        start = time.time()
+        # --compare-whole a besoin du résultat fenêtré : pas de RTTM repris du cache
+        refresh = bool(args.window and args.compare_whole)
+        with PeakMemory() as memory:
+            diarization = diarize_to_rttm(diarizer, audio, rttm_path, cache, options=options, variant=variant, refresh=refresh)
+        end = time.time()
+
+        spinner_thread.stop = True
+        spinner_thread.join()
+        if diarization is None:
+            sys.stdout.write("\r♻️ RTTM déjà en cache pour cet audio, diarisation ignorée.\n")
+        else:
+            sys.stdout.write("\r✅ Diarisation terminée.                        \n")
+            cost_model.record("diarize", model_name, str(device), duration, count_segments(rttm_path), end - start)
+            cost_model.save()
+
+        # === 3. SAUVEGARDE DU RTTM ===
+        print(f"📝 Fichier RTTM enregistré : {rttm_path}")
+        if args.window:
+            # Pic mesuré sur cette seule passe (pas depuis le début du processus)
+            print(f"🪟 Diarisation par fenêtres de {args.window:.0f} s | pic RSS : {memory.peak_mb:.0f} Mo (+{memory.peak_mb - memory.start_mb:.0f} Mo)")
+            if args.compare_whole and diarization is not None:
+                comparison = compare_with_whole_file(pipeline, audio, diarization, memory)
+                print(f"📊 Pic RSS fenêtré : {comparison['windowed_rss_mb']:.0f} Mo (+{comparison['windowed_added_mb']:.0f} Mo) | "
+                      f"fichier entier : {comparison['whole_rss_mb']:.0f} Mo (+{comparison['whole_added_mb']:.0f} Mo)")
+                print(f"📊 DER fenêtré vs fichier entier : {100 * comparison['der']:.1f} %")
+
+        if wav_writer:
+            wav_writer.join()
+            print(f"🎧 WAV enregistré : {wav_path}")
+
+        # === 4. ARCHIVAGE DU FICHIER ORIGINAL ===
+        archived_path = archive_input(input_path, archived_folder)
+        print(f"📦 Fichier archivé : {archived_path}")
+
+        # === 5. AFFICHAGE TEMPS FINAL + METRICS ===
+        elapsed = int(end - start)
+        print(f"⏳ Temps réel de traitement : {elapsed // 60} min {elapsed % 60} sec")
+        print(metrics.format_usage(sampler.stop()))
+
+    if args.shared:
+        diarize_shared(args, process)
+        return
+
+    # === LISTAGE DES FICHIERS À TRAITER ===
+    # Normalisation des noms de fichiers
+    normalized_files = list_input_files(input_folder)
+    if not normalized_files:
+        print(f"\n⚠️ Aucun fichier audio ou vidéo trouvé dans '{input_folder}/'.")
+        return
+
+    # Les plus longs d'abord (durée ffprobe × coût mesuré), pour ne pas
+    # finir le lot sur un seul gros fichier
+    durations = [probe_duration(os.path.join(input_folder, filename)) for filename in normalized_files]
+    normalized_files, makespan = order_by_cost(
+        normalized_files, durations, cost_model, [("diarize", model_name, str(device))]
+    )
+    print(f"\n🎯 {len(normalized_files)} fichier(s) détecté(s) à traiter, durée prévue : {format_duration(makespan)}.\n")
+
+    # Utiliser les fichiers normalisés pour le traitement
+    for idx, filename in enumerate(normalized_files, 1):
+        process(filename, f"{idx}/{len(normalized_files)}")
+
+    print("\n🎉 Tous les fichiers ont été traités avec succès.")
+
+
+def diarize_shared(args, process):
+    # Chaque fichier d'entrée est pris sous bail par un seul worker ; les
+    # fichiers d'un worker arrêté sont repris par les autres après --lease.
+    from transcriber.diarization import list_input_files
+    from transcriber.work_queue import WorkQueue, list_files
+
+    queue = WorkQueue(args.output, "diarize", args.lease)
+    print(f"\n🤝 Mode distribué : worker {queue.worker}, baux dans {queue.folder}")
+
+    def pending():
+        # Noms normalisés (par ce worker ou un autre) ; signature = taille et date
+        list_input_files(args.input)
+        return {
+            name: (signature, filename.replace(" ", "_"))
+            for name, (signature, filename) in list_files(args.input).items()
+        }
+
+    done = 0
+    try:
+        for name, filename in queue.claims(pending):
+            with queue.hold(name):
+                done += 1
+                process(filename, f"{done} ({queue.worker})")
+    finally:
+        queue.close()
+    print(f"\n🎉 Plus aucun fichier à diariser : {done} fichier(s) traité(s) par ce worker.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+
+import shutil
+
+import numpy as np
+
+from transcriber.defaults import DEFAULT_CACHE_SIZE_MB
+from transcriber.metrics import METRICS
+
+
+def _save_npy(path, array):
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, np.ascontiguousarray(array, dtype=np.float32))
+    os.replace(tmp_path, path)
+
+
+# === CACHE DES SEGMENTATIONS ET EMBEDDINGS PYANNOTE ===
+# La segmentation et les embeddings de locuteurs (l'essentiel du temps de
+# diarisation) sont enregistrés par empreinte audio en .npy float32 et relus
+# en projection mémoire. Le pipeline pyannote s'exécute normalement, seules
+# ses étapes get_segmentations / get_embeddings sont court-circuitées : changer
+# le nombre de locuteurs ou le seuil de clustering ne relance que le
+# clustering. La clé inclut les modèles et les paramètres dont dépendent ces
+# sorties, pas ceux du clustering. Comme pour les transcriptions, l'éviction
+# LRU se fait par dossier <audio>/<modèles> sur la date de dernier accès au-delà
+# de `max_bytes`.
+class EmbeddingCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 ** 2):
+        self.root = os.path.join(cache_dir, "diarization")
+        self.max_bytes = max_bytes
+
+    def install(self, pipeline):
+        # Sans effet sur un pipeline qui n'expose pas ces étapes (autre version, substitut)
+        if not (hasattr(pipeline, "get_segmentations") and hasattr(pipeline, "get_embeddings")):
+            return False
+        get_segmentations = pipeline.get_segmentations
+        get_embeddings = pipeline.get_embeddings
+
+        def cached_segmentations(file, *args, **kwargs):
+            folder = self._folder(pipeline, file)
+            if folder is None:
+                return get_segmentations(file, *args, **kwargs)
+            path = os.path.join(folder, "segmentation.npy")
+            if os.path.exists(path):
+                METRICS.count("embedding_cache_hits_total", step="segmentation")
+                os.utime(folder)
+                return self._load_segmentation(folder)
+            segmentations = get_segmentations(file, *args, **kwargs)
+            self._save_segmentation(folder, segmentations)
+            self.evict(keep=folder)
+            return segmentations
+
+        def cached_embeddings(file, *args, **kwargs):
+            folder = self._folder(pipeline, file)
+            if folder is None:
+                return get_embeddings(file, *args, **kwargs)
+            path = os.path.join(folder, "embeddings.npy")
+            if os.path.exists(path):
+                METRICS.count("embedding_cache_hits_total", step="embeddings")
+                os.utime(folder)
+                return np.load(path, mmap_mode="c")
+            embeddings = get_embeddings(file, *args, **kwargs)
+            _save_npy(path, embeddings)
+            os.utime(folder)
+            self.evict(keep=folder)
+            return embeddings
+
+        pipeline.get_segmentations = cached_segmentations
+        pipeline.get_embeddings = cached_embeddings
+        return True
+
+    @staticmethod
+    def model_key(pipeline):
+        # Modèles, pas de segmentation, exclusion du recouvrement et seuil de
+        # binarisation (absent des modèles powerset)
+        segmentation = getattr(pipeline, "segmentation", None)
+        parts = (
+            str(getattr(pipeline, "segmentation_model", None)),
+            str(getattr(pipeline, "embedding", None)),
+            getattr(pipeline, "segmentation_step", None),
+            getattr(pipeline, "embedding_exclude_overlap", None),
+            getattr(segmentation, "threshold", None),
+        )
+        return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+    def _folder(self, pipeline, file):
+        audio_key = file.get("audio_key") if hasattr(file, "get") else None
+        if audio_key is None:
+            return None
+        folder = os.path.join(self.root, audio_key, self.model_key(pipeline))
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def _entries(self):
+        # (dernier accès, taille, dossier) de chaque entrée <audio>/<modèles>
+        if not os.path.isdir(self.root):
+            return
+        for audio_key in os.listdir(self.root):
+            audio_folder = os.path.join(self.root, audio_key)
+            try:
+                folders = [os.path.join(audio_folder, model_key) for model_key in os.listdir(audio_folder)]
+            except OSError:
+                continue
+            for folder in folders:
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+                    yield os.stat(folder).st_mtime, size, folder
+                except OSError:
+                    continue
+
+    def evict(self, keep=None):
+        # Supprime les entrées les moins récemment utilisées jusqu'à 90 % du
+        # quota, sauf celle en cours d'écriture
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for _, size, folder in entries:
+            if total <= target:
+                break
+            if folder == keep:
+                continue
+            shutil.rmtree(folder, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(folder))
+            except OSError:
+                pass  # autres modèles pour le même audio
+            total -= size
+            METRICS.count("embedding_cache_evictions_total")
+
+    # Scores de segmentation : tableau (fenêtres, trames, locuteurs locaux)
+    # et fenêtre glissante décrite à part en JSON
+    def _save_segmentation(self, folder, segmentations):
+        window = segmentations.sliding_window
+        with open(os.path.join(folder, "segmentation.json"), "w") as f:
+            json.dump({"start": window.start, "duration": window.duration, "step": window.step}, f)
+        _save_npy(os.path.join(folder, "segmentation.npy"), segmentations.data)
+
+    def _load_segmentation(self, folder):
+        from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+        with open(os.path.join(folder, "segmentation.json")) as f:
+            window = json.load(f)
+        # Copie à l'écriture : pyannote peut modifier les scores en place
+        data = np.load(os.path.join(folder, "segmentation.npy"), mmap_mode="c")
+        return SlidingWindowFeature(data, SlidingWindow(**window))
+
+
+def clustering_options(num_speakers=None, min_speakers=None, max_speakers=None):
+    # Arguments d'appel du pipeline pyannote (valeurs non fournies omises)
+    options = {"num_speakers": num_speakers, "min_speakers": min_speakers, "max_speakers": max_speakers}
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def clustering_variant(options, threshold=None):
+    # Suffixe de la clé du RTTM en cache quand le clustering est réglé à la main
+    parts = [f"{name.split('_')[0]}{value}" for name, value in sorted(options.items())]
+    if threshold is not None:
+        parts.append(f"t{threshold:g}")
+    return "-".join(parts) or None
+
+
+def set_clustering_threshold(pipeline, threshold):
+    clustering = getattr(pipeline, "clustering", None)
+    if threshold is None or clustering is None or not hasattr(clustering, "threshold"):
+        return False
+    clustering.threshold = threshold
+    return True
@@ -0,0 +1,378 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes (secondes) des histogrammes de latence, à la Prometheus
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+PREFIX = "transcriber_"
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _series(name, labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return PREFIX + name
+    return PREFIX + name + "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _atomic_write(path, text):
+    # Le collecteur textfile de node_exporter ne doit jamais lire un fichier partiel
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# === HISTOGRAMME À SEAUX FIXES ===
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Estimation par la borne supérieure du seau atteint
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count,
+                "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["buckets"])
+        histogram.counts = list(data["counts"])
+        histogram.sum, histogram.count, histogram.max = data["sum"], data["count"], data["max"]
+        return histogram
+
+
+# === REGISTRE DE MESURES ===
+# Compteurs, jauges et histogrammes étiquetés, partagés par les threads du
+# pipeline. Une jauge garde sa dernière valeur ; peak() garde en plus son
+# maximum, exporté sous <nom>_max. Un registre global (METRICS) est alimenté en permanence ; les CLI
+# décident d'écrire ou non les rapports.
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.peaks = {}
+        self.histograms = {}
+        self.profiler = None
+        self.started = time.time()
+
+    def count(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def peak(self, name, value, **labels):
+        # Jauge (dernière valeur) et son maximum : mémoire d'un worker...
+        key = (name, _labels(labels))
+        with self._lock:
+            self.gauges[key] = value
+            self.peaks[key] = max(self.peaks.get(key, value), value)
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        # Durée de l'étape dans l'histogramme stage_seconds{stage=...}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    @contextmanager
+    def profile_thread(self):
+        # Profil cProfile du thread courant si le profilage est actif
+        if self.profiler is None:
+            yield
+            return
+        with self.profiler.thread():
+            yield
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.peaks.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    # === SÉRIALISATION ===
+    def snapshot(self):
+        # Forme JSON, aussi utilisée pour remonter les mesures des workers
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                "peaks": [[name, list(labels), value] for (name, labels), value in self.peaks.items()],
+                "histograms": [[name, list(labels), h.to_dict()] for (name, labels), h in self.histograms.items()],
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, value in snapshot["gauges"]:
+                self.gauges[(name, tuple(map(tuple, labels)))] = value
+            for name, labels, value in snapshot.get("peaks", ()):
+                key = (name, tuple(map(tuple, labels)))
+                self.peaks[key] = max(self.peaks.get(key, value), value)
+            for name, labels, data in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                incoming = Histogram.from_dict(data)
+                current = self.histograms.get(key)
+                if current is None or current.buckets != incoming.buckets:
+                    self.histograms[key] = incoming
+                    continue
+                current.counts = [a + b for a, b in zip(current.counts, incoming.counts)]
+                current.sum += incoming.sum
+                current.count += incoming.count
+                current.max = max(current.max, incoming.max)
+
+    def report(self, **extra):
+        # Rapport lisible : totaux par étape (somme, nombre, p50, p95, max)
+        with self._lock:
+            stages = {}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                key = _series(name, labels)[len(PREFIX):]
+                stages[key] = {
+                    "count": histogram.count,
+                    "total_s": round(histogram.sum, 4),
+                    "p50_s": round(histogram.quantile(0.5), 4),
+                    "p95_s": round(histogram.quantile(0.95), 4),
+                    "max_s": round(histogram.max, 4),
+                }
+            counters = {_series(name, labels)[len(PREFIX):]: value for (name, labels), value in sorted(self.counters.items())}
+            gauges = {_series(name, labels)[len(PREFIX):]: value for (name, labels), value in sorted(self.gauges.items())}
+            gauges.update({_series(f"{name}_max", labels)[len(PREFIX):]: value for (name, labels), value in sorted(self.peaks.items())})
+        return {"started": self.started, "elapsed_s": round(time.time() - self.started, 3), "histograms": stages,
+                "counters": counters, "gauges": gauges, **extra}
+
+    def write_json(self, path, **extra):
+        _atomic_write(path, json.dumps(self.report(**extra), indent=2, ensure_ascii=False))
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines += [f"{_series(n, labels)} {value}" for (n, labels), value in sorted(self.counters.items()) if n == name]
+            for name in sorted({name for name, _ in self.gauges}):
+                lines.append(f"# TYPE {PREFIX}{name} gauge")
+                lines += [f"{_series(n, labels)} {value}" for (n, labels), value in sorted(self.gauges.items()) if n == name]
+            for name in sorted({name for name, _ in self.peaks}):
+                lines.append(f"# TYPE {PREFIX}{name}_max gauge")
+                lines += [f"{_series(n + '_max', labels)} {value}" for (n, labels), value in sorted(self.peaks.items()) if n == name]
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for (n, labels), histogram in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{_series(name + '_bucket', labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{_series(name + '_bucket', labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{_series(name + '_sum', labels)} {histogram.sum}")
+                    lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        _atomic_write(path, self.prometheus_text())
+
+
+METRICS = Metrics()
+
+
+# === ÉCHANTILLONNEUR DE RESSOURCES ===
+# Thread de fond : CPU et mémoire du processus, E/S disque du processus
+# depuis le démarrage de l'échantillonneur. cpu_percent(None) compare à
+# l'appel précédent et ne bloque donc jamais.
+class ResourceSampler(threading.Thread):
+    def __init__(self, interval=0.5):
+        super().__init__(name="resource-sampler", daemon=True)
+        import psutil
+
+        self.interval = interval
+        self.process = psutil.Process()
+        self.stopped = threading.Event()
+        self.samples = 0
+        self.cpu_total = 0.0
+        self.cpu_max = 0.0
+        self.rss_peak = 0
+        self.io_start = self._io()
+        self.io_end = self.io_start
+        self.started = time.time()
+        self.process.cpu_percent(None)
+
+    def _io(self):
+        try:
+            counters = self.process.io_counters()
+            return counters.read_bytes, counters.write_bytes
+        except (AttributeError, OSError):
+            return None  # indisponible sur macOS
+
+    def sample(self):
+        cpu = self.process.cpu_percent(None)
+        self.samples += 1
+        self.cpu_total += cpu
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.rss_peak = max(self.rss_peak, self.process.memory_info().rss)
+        self.io_end = self._io()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+        self.sample()
+        return self.summary()
+
+    def summary(self):
+        io = None
+        if self.io_start and self.io_end:
+            io = (self.io_end[0] - self.io_start[0], self.io_end[1] - self.io_start[1])
+        return {
+            "elapsed_s": round(time.time() - self.started, 3),
+            "cpu_percent_mean": round(self.cpu_total / max(self.samples, 1), 1),
+            "cpu_percent_max": round(self.cpu_max, 1),
+            "rss_peak_mb": round(self.rss_peak / 1024 ** 2, 1),
+            "read_mb": round(io[0] / 1024 ** 2, 1) if io else None,
+            "write_mb": round(io[1] / 1024 ** 2, 1) if io else None,
+        }
+
+
+def format_usage(summary):
+    line = (f"🧠 CPU processus : {summary['cpu_percent_mean']:.0f}% moyen, {summary['cpu_percent_max']:.0f}% max"
+            f"   |   pic RSS : {summary['rss_peak_mb']:.0f} Mo")
+    if summary["read_mb"] is not None:
+        line += f"\n💾 Disque (ce traitement) : {summary['read_mb']:.0f} Mo lus  |  {summary['write_mb']:.0f} Mo écrits"
+    return line
+
+
+# === PROFILAGE ===
+# Un cProfile par thread (les étapes du pipeline tournent dans des threads),
+# fusionnés dans un seul fichier .prof lisible par pstats/snakeviz. Depuis
+# Python 3.12, cProfile couvre déjà tous les threads : l'activation d'un
+# second profil échoue et le profil principal suffit.
+class Profiler:
+    def __init__(self, path):
+        self.path = path
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+    def dump(self):
+        import pstats
+
+        with self._lock:
+            profiles = [profile for profile in self.profiles if profile.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+        return stats
+
+
+# === SESSION DE MESURE POUR LES CLI ===
+def add_arguments(parser):
+    parser.add_argument("--metrics-json", type=str, default=None, help="Écrit un rapport JSON des mesures (temps par étape, latences, ressources)")
+    parser.add_argument("--metrics-prom", type=str, default=None, help="Écrit les mesures au format textfile Prometheus (collecteur node_exporter)")
+    parser.add_argument("--profile", type=str, default=None, help="Profil cProfile (.prof) de l'exécution ; à utiliser sur un seul fichier")
+
+
+class MetricsSession:
+    # with MetricsSession(args): ... — échantillonneur et profil actifs le
+    # temps de l'exécution, rapports écrits à la sortie (même en cas d'erreur).
+    def __init__(self, args, metrics=METRICS):
+        self.args = args
+        self.metrics = metrics
+        self.sampler = None
+
+    def __enter__(self):
+        self.sampler = ResourceSampler()
+        self.sampler.start()
+        if self.args.profile:
+            self.metrics.profiler = Profiler(self.args.profile)
+            print(f"🔬 Profilage actif (PID {os.getpid()}, également attachable avec `py-spy record -p {os.getpid()}`)")
+            self._main_profile = self.metrics.profiler.thread()
+            self._main_profile.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if self.metrics.profiler is not None:
+            self._main_profile.__exit__(None, None, None)
+            stats = self.metrics.profiler.dump()
+            self.metrics.profiler = None
+            if stats:
+                print(f"🔬 Profil enregistré : {self.args.profile}")
+                stats.sort_stats("cumulative").print_stats(15)
+        usage = self.sampler.stop()
+        for key, value in usage.items():
+            if value is not None:
+                self.metrics.gauge(f"process_{key}", value)
+        if self.args.metrics_json:
+            self.metrics.write_json(self.args.metrics_json, resources=usage)
+            print(f"📊 Rapport de mesures : {self.args.metrics_json}")
+        if self.args.metrics_prom:
+            self.metrics.write_prometheus(self.args.metrics_prom)
+            print(f"📊 Mesures Prometheus : {self.args.metrics_prom}")
+        return False
@@ -0,0 +1,271 @@
+import os
+import queue
+import threading
+import time
+import traceback
+
+from transcriber.audio_source import SegmentSource, pcm_hash
+from transcriber.cpu_inference import load_model, text_variant, tune_threads
+from transcriber.embedding_cache import (
+    EmbeddingCache, clustering_options, clustering_variant, set_clustering_threshold
+)
+from transcriber.defaults import (
+    DEFAULT_CACHE_DIR, DEFAULT_STITCH_THRESHOLD, DEFAULT_WINDOW_OVERLAP, MODEL_MAP, SAMPLE_RATE
+)
+from transcriber.metrics import METRICS
+from transcriber.scheduler import count_segments, device_label, format_duration, order_by_cost
+from transcriber.transcription import transcribe_file
+from transcriber.diarization import (
+    archive_input, convert_to_wav, decode_audio, diarize_to_rttm, get_duration, list_input_files, load_pipeline,
+    probe_duration, write_wav_in_background
+)
+from transcriber.windowed_diarization import WindowedDiarizer
+
+_DONE = object()
+
+
+# === ÉTAPE DU PIPELINE ===
+# Un thread par étape, relié aux suivantes par des files bornées ; le temps
+# passé dans `work` sert à mesurer l'utilisation de chaque étape.
+class Stage(threading.Thread):
+    def __init__(self, name, work, inbox, outbox=None, on_failure=None):
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.on_failure = on_failure
+        self.inbox = inbox
+        self.outbox = outbox
+        self.busy = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    def run(self):
+        with METRICS.profile_thread():
+            self._loop()
+
+    def _loop(self):
+        while True:
+            wait_start = time.time()
+            job = self.inbox.get()
+            METRICS.observe("stage_wait_seconds", time.time() - wait_start, stage=self.name)
+            if job is _DONE:
+                break
+            start = time.time()
+            try:
+                result = self.work(job)
+            except Exception:
+                self.failed += 1
+                METRICS.count("failures_total", stage=self.name)
+                print(f"\n❌ Étape {self.name} en échec pour {job['filename']} :")
+                traceback.print_exc()
+                if self.on_failure:
+                    self.on_failure(job)
+                result = None
+            self.busy += time.time() - start
+            if result is not None:
+                self.processed += 1
+                if self.outbox is not None:
+                    self.outbox.put(result)
+        if self.outbox is not None:
+            self.outbox.put(_DONE)
+
+
+# === ORCHESTRATEUR EN PROCESSUS UNIQUE ===
+class PipelineRunner:
+    def __init__(self, input_folder, output_folder, model="base", language="fr", gpu=False,
+                 queue_size=2, transcribe_options=None, cache=None, cpu_optimized=False, model_cache_dir=DEFAULT_CACHE_DIR,
+                 cost_model=None, stream=False, keep_wav=False,
+                 window=0, window_overlap=DEFAULT_WINDOW_OVERLAP, stitch_threshold=DEFAULT_STITCH_THRESHOLD,
+                 speakers=None, clustering_threshold=None):
+        self.input_folder = input_folder
+        self.output_folder = output_folder
+        self.archived_folder = os.path.join(output_folder, "archived")
+        self.failed_folder = os.path.join(output_folder, "failed")
+        self.transcripts_folder = os.path.join(output_folder, "transcripts")
+        self.model_name = MODEL_MAP.get(model, model)
+        self.language = language
+        self.gpu = gpu
+        self.queue_size = queue_size
+        self.transcribe_options = transcribe_options or {}
+        self.cache = cache
+        self.cpu_optimized = cpu_optimized
+        self.model_cache_dir = model_cache_dir
+        self.cost_model = cost_model
+        # Par fenêtres, la diarisation lit le WAV fenêtre par fenêtre : pas de tampon PCM complet
+        self.stream = stream and not window
+        if stream and window:
+            print("⚠️ --stream ignoré avec --window : les fenêtres sont lues depuis le WAV (mémoire constante).")
+        self.keep_wav = keep_wav
+        self.window = window
+        self.window_overlap = window_overlap
+        self.stitch_threshold = stitch_threshold
+        # Réglages du clustering : (num, min, max) locuteurs et seuil
+        self.clustering = clustering_options(*(speakers or ()))
+        self.clustering_threshold = clustering_threshold
+        self.pipeline = None
+        self.diarizer = None
+        self.model = None
+
+    def load_models(self):
+        # Modèles chargés une seule fois pour tout le lot
+        print("\n🔁 Initialisation du modèle de diarisation (pyannote)...")
+        self.pipeline, device = load_pipeline(self.gpu)
+        if self.cache:
+            EmbeddingCache(self.model_cache_dir, self.cache.max_bytes).install(self.pipeline)
+        set_clustering_threshold(self.pipeline, self.clustering_threshold)
+        self.diarizer = self.pipeline
+        if self.window:
+            self.diarizer = WindowedDiarizer(self.pipeline, self.window, self.window_overlap, self.stitch_threshold)
+        print(f"✅ Modèle chargé avec succès sur {device}.")
+        print(f"\n🧠 Chargement du modèle Whisper '{self.model_name}'...")
+        whisper_device = "cuda" if self.gpu else "cpu"
+        if self.cpu_optimized and not self.gpu:
+            print(f"🧵 {tune_threads()} threads torch")
+        self.model = load_model(self.model_name, whisper_device, self.cpu_optimized, self.model_cache_dir)
+        print(f"✅ Modèle prêt sur {whisper_device.upper()}.")
+
+    # === 1. CONVERSION EN WAV (OU DÉCODAGE EN FLUX) ===
+    def convert(self, job):
+        start = time.time()
+        if self.stream:
+            # Tampon PCM en mémoire partagé par la diarisation et la transcription ;
+            # le WAV n'est écrit (en arrière-plan) que s'il doit être conservé.
+            job["pcm"] = decode_audio(job["input_path"])
+            job["duration"] = round(len(job["pcm"]) / SAMPLE_RATE, 2)
+            job["audio_key"] = pcm_hash(job["pcm"]) if self.cache else None
+            if self.keep_wav:
+                job["wav_writer"] = write_wav_in_background(job["pcm"], job["wav_path"])
+        else:
+            convert_to_wav(job["input_path"], job["wav_path"])
+            job["duration"] = get_duration(job["wav_path"])
+        print(f"🎧 Converti : {job['filename']} ({int(job['duration'] // 60)} min {int(job['duration'] % 60)} sec)")
+        self.record("convert", "ffmpeg-stream" if self.stream else "ffmpeg", job, time.time() - start)
+        return job
+
+    # === 2. DIARISATION ===
+    def diarize(self, job):
+        audio = job["pcm"] if self.stream else job["wav_path"]
+        start = time.time()
+        diarization = diarize_to_rttm(
+            self.diarizer, audio, job["rttm_path"], self.cache, job.get("audio_key"),
+            self.clustering, clustering_variant(self.clustering, self.clustering_threshold)
+        )
+        if diarization is not None:
+            model = f"pyannote-w{self.window:g}" if self.window else "pyannote"
+            self.record("diarize", model, job, time.time() - start, count_segments(job["rttm_path"]))
+        print(f"{'♻️ RTTM repris du cache' if diarization is None else '📝 RTTM enregistré'} : {job['rttm_path']}")
+        return job
+
+    # === 3. TRANSCRIPTION ===
+    def transcribe(self, job):
+        source = SegmentSource.from_pcm(job.pop("pcm")) if self.stream else None
+        start = time.time()
+        transcribe_file(job["wav_path"], job["rttm_path"], self.transcripts_folder, self.model,
+                        language=self.language, cache=self.cache,
+                        model_name=text_variant(self.model_name, "cuda" if self.gpu else "cpu", self.cpu_optimized),
+                        source=source, audio_key=job.get("audio_key"), **self.transcribe_options)
+        self.record("transcribe", self.model_name, job, time.time() - start, count_segments(job["rttm_path"]))
+        if self.cost_model:
+            self.cost_model.save()  # le mode service peut tourner plusieurs jours
+        if job.get("wav_writer"):
+            job.pop("wav_writer").join()
+        # Archivé une fois la transcription écrite : après un arrêt en cours de
+        # route, l'original reste dans le dossier d'entrée
+        archive_input(job["input_path"], self.archived_folder)
+        return job
+
+    def fail(self, job):
+        # Fichier en échec sorti du dossier d'entrée (comme l'archivage) : en
+        # mode surveillance, il n'y reste pas bloqué et n'est pas retenté en
+        # boucle ; le redéposer relance son traitement.
+        if job.get("wav_writer"):
+            job.pop("wav_writer").join()
+        try:
+            failed_path = archive_input(job["input_path"], self.failed_folder)
+        except OSError:
+            return  # déjà déplacé ou supprimé
+        print(f"🚫 Fichier en échec déplacé : {failed_path}")
+
+    def record(self, stage, model, job, seconds, segments=0):
+        # Mesures pour le modèle de coût (ordonnancement et temps restant)
+        if self.cost_model:
+            device = device_label(self.gpu, self.cpu_optimized and not self.gpu)
+            self.cost_model.record(stage, model, device, job["duration"], segments, seconds)
+
+    def order(self, filenames):
+        # Les plus coûteux d'abord (conversion + diarisation + transcription
+        # prévues d'après la durée ffprobe), comme les CLI de transcription
+        device = device_label(self.gpu, self.cpu_optimized and not self.gpu)
+        stages = [
+            ("convert", "ffmpeg-stream" if self.stream else "ffmpeg", device),
+            ("diarize", f"pyannote-w{self.window:g}" if self.window else "pyannote", device),
+            ("transcribe", self.model_name, device),
+        ]
+        durations = [probe_duration(os.path.join(self.input_folder, filename)) for filename in filenames]
+        filenames, makespan = order_by_cost(filenames, durations, self.cost_model, stages)
+        print(f"📅 Ordre : les plus longs d'abord, durée prévue : {format_duration(makespan)}")
+        return filenames
+
+    def make_job(self, filename):
+        base_name = os.path.splitext(filename)[0]
+        return {
+            "filename": filename,
+            "input_path": os.path.join(self.input_folder, filename),
+            "wav_path": os.path.join(self.output_folder, f"{base_name}.wav"),
+            "rttm_path": os.path.join(self.output_folder, f"{base_name}.rttm"),
+        }
+
+    def run(self, filenames=None):
+        if filenames is None:
+            filenames = list_input_files(self.input_folder)
+        if not filenames:
+            print(f"\n⚠️ Aucun fichier audio ou vidéo trouvé dans '{self.input_folder}/'.")
+            return []
+
+        self.start()
+        print(f"\n🎯 {len(filenames)} fichier(s) détecté(s) à traiter.\n")
+        if self.cost_model:
+            filenames = self.order(filenames)
+        for filename in filenames:
+            self.submit(filename)
+        return self.finish()
+
+    # Pipeline ouvert : les fichiers peuvent être soumis au fil de l'eau
+    # (mode surveillance) jusqu'à `finish`, modèles et threads restant actifs.
+    def start(self):
+        os.makedirs(self.archived_folder, exist_ok=True)
+        os.makedirs(self.failed_folder, exist_ok=True)
+        os.makedirs(self.transcripts_folder, exist_ok=True)
+        if self.pipeline is None or self.model is None:
+            self.load_models()
+        self._to_convert = queue.Queue()
+        to_diarize = queue.Queue(maxsize=self.queue_size)
+        to_transcribe = queue.Queue(maxsize=self.queue_size)
+        self.stages = [
+            Stage("conversion", self.convert, self._to_convert, to_diarize, self.fail),
+            Stage("diarisation", self.diarize, to_diarize, to_transcribe, self.fail),
+            Stage("transcription", self.transcribe, to_transcribe, on_failure=self.fail),
+        ]
+        self._start_time = time.time()
+        for stage in self.stages:
+            stage.start()
+
+    def submit(self, filename):
+        self._to_convert.put(self.make_job(filename))
+
+    def finish(self):
+        self._to_convert.put(_DONE)
+        for stage in self.stages:
+            stage.join()
+        self.report(self.stages, time.time() - self._start_time)
+        if self.cost_model:
+            self.cost_model.save()
+        return self.stages
+
+    def report(self, stages, elapsed):
+        print(f"\n📊 Utilisation des étapes sur {int(elapsed) // 60} min {int(elapsed) % 60} sec :")
+        for stage in stages:
+            usage = 100 * stage.busy / max(elapsed, 1e-6)
+            METRICS.gauge("stage_utilisation_ratio", round(stage.busy / max(elapsed, 1e-6), 4), stage=stage.name)
+            print(f"   {stage.name:<14} {usage:5.1f}%  ({stage.processed} ok, {stage.failed} en échec)")
+        bottleneck = max(stages, key=lambda stage: stage.busy)
+        print(f"🐢 Étape limitante : {bottleneck.name}")
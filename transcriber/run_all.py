@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+
+from transcriber import metrics
+from transcriber.defaults import (
+    BATCH_SECONDS, BATCH_SIZE, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, DEFAULT_STITCH_THRESHOLD,
+    DEFAULT_WINDOW_OVERLAP, MAX_SEGMENT_DURATION, MERGE_GAP, MIN_SEGMENT_DURATION,
+    OUTPUT_FORMATS, VAD_MARGIN_DB, VAD_MIN_SPEECH, VAD_PADDING, VAD_THRESHOLD_DB, VAD_ZCR_THRESHOLD, WATCH_INTERVAL,
+    WATCH_SETTLE
+)
+from transcriber.transcript_writer import parse_formats
+
+
+def main():
+    # Charger les variables d'environnement depuis .env
+    from dotenv import load_dotenv
+    load_dotenv()
+    default_input = os.getenv("INPUT_FOLDER", "input")
+    default_output = os.getenv("OUTPUT_FOLDER", "output")
+    default_model = os.getenv("WHISPER_MODEL", "base")
+
+    # === PARSEUR D'ARGUMENTS CLI ===
+    parser = argparse.ArgumentParser(description="Pipeline complet pour la diarisation et la transcription audio")
+    parser.add_argument("--gpu", action="store_true", help="Force l'utilisation du GPU pour Pyannote et Whisper")
+    parser.add_argument("--lang", type=str, default="fr", help="Langue de transcription (ex: 'fr', 'en', 'es')")
+    parser.add_argument("--model", type=str, default=default_model, help="Modèle Whisper à utiliser (1=tiny, 2=base, 3=small, 4=medium, 5=large, 6=large-v3)")
+    parser.add_argument("--input", type=str, default=default_input, help="Dossier contenant les fichiers audio à traiter")
+    parser.add_argument("--output", type=str, default=default_output, help="Dossier où enregistrer les fichiers traités")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Nombre maximal de segments par lot Whisper (1 = segment par segment)")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS, help="Durée audio cumulée maximale par lot (secondes)")
+    parser.add_argument("--merge-gap", type=float, default=MERGE_GAP, help="Fusionne les tours consécutifs d'un même locuteur séparés de moins de N secondes (0 = désactivé)")
+    parser.add_argument("--max-segment", type=float, default=MAX_SEGMENT_DURATION, help="Durée maximale d'un segment fusionné (secondes)")
+    parser.add_argument("--min-segment", type=float, default=MIN_SEGMENT_DURATION, help="Rattache au tour voisin le plus proche les fragments isolés plus courts que N secondes (0 = désactivé)")
+    parser.add_argument("--single-pass", action="store_true", help="Transcrit chaque fichier en une passe et attribue chaque mot à un locuteur")
+    parser.add_argument("--vad", action="store_true", help="Rogne les silences en bord de segment et ignore les segments sans parole avant Whisper")
+    parser.add_argument("--vad-threshold", type=float, default=VAD_THRESHOLD_DB, help="Énergie minimale d'une trame de parole (dB pleine échelle)")
+    parser.add_argument("--vad-margin", type=float, default=VAD_MARGIN_DB, help="Écart minimal au plancher de bruit du fichier (dB)")
+    parser.add_argument("--vad-zcr", type=float, default=VAD_ZCR_THRESHOLD, help="Taux de passage par zéro au-delà duquel une trame plus faible compte comme parole (fricatives)")
+    parser.add_argument("--vad-padding", type=float, default=VAD_PADDING, help="Marge conservée autour de la parole détectée (secondes)")
+    parser.add_argument("--vad-min-speech", type=float, default=VAD_MIN_SPEECH, help="Parole minimale pour transcrire un segment (secondes)")
+    parser.add_argument("--vad-debug", action="store_true", help="Écrit <nom>.vad.rttm avec les zones retirées par le VAD")
+    parser.add_argument("--formats", type=parse_formats, default=",".join(OUTPUT_FORMATS), help="Formats de transcription écrits au fil de l'eau, séparés par des virgules (txt, jsonl, srt, vtt)")
+    parser.add_argument("--cpu-optimized", action="store_true", help="CPU : couches linéaires de Whisper quantifiées en int8 (mises en cache) et threads torch ajustés aux cœurs physiques")
+    parser.add_argument("--queue-size", type=int, default=2, help="Nombre maximal de fichiers en attente entre deux étapes")
+    parser.add_argument("--cache-dir", type=str, default=os.getenv("CACHE_FOLDER", DEFAULT_CACHE_DIR), help="Dossier du cache (RTTM et transcriptions)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB, help="Taille maximale du cache de transcriptions, et de celui des embeddings (Mo)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache")
+    parser.add_argument("--stream", action="store_true", help="Décode l'audio en flux vers la mémoire, sans WAV intermédiaire")
+    parser.add_argument("--keep-wav", action="store_true", help="Avec --stream, écrit quand même le WAV en arrière-plan (pour relancer la transcription seule)")
+    parser.add_argument("--window", type=float, default=0, help="Diarisation par fenêtres de N secondes à mémoire bornée (0 = fichier entier)")
+    parser.add_argument("--window-overlap", type=float, default=DEFAULT_WINDOW_OVERLAP, help="Recouvrement entre fenêtres de diarisation (secondes)")
+    parser.add_argument("--stitch-threshold", type=float, default=DEFAULT_STITCH_THRESHOLD, help="Distance cosinus maximale pour relier un locuteur d'une fenêtre à un locuteur connu")
+    parser.add_argument("--num-speakers", type=int, default=None, help="Nombre de locuteurs connu")
+    parser.add_argument("--min-speakers", type=int, default=None, help="Nombre minimal de locuteurs")
+    parser.add_argument("--max-speakers", type=int, default=None, help="Nombre maximal de locuteurs")
+    parser.add_argument("--clustering-threshold", type=float, default=None, help="Seuil du clustering des locuteurs pyannote (défaut du modèle sinon)")
+    parser.add_argument("--watch", action="store_true", help="Service : garde les modèles en mémoire et traite les fichiers au fil de leur arrivée dans --input")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL, help="Intervalle de scrutation du dossier sans inotify (secondes)")
+    parser.add_argument("--watch-settle", type=float, default=WATCH_SETTLE, help="Délai sans modification avant de traiter un fichier (secondes)")
+    parser.add_argument("--watch-polling", action="store_true", help="Force la scrutation périodique même si watchdog (inotify) est installé")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Imports lourds (torch, whisper, pyannote) après l'analyse des arguments
+    from transcriber.orchestrator import PipelineRunner
+    from transcriber.scheduler import load_cost_model
+    from transcriber.transcript_cache import TranscriptCache
+    from transcriber.vad import VoiceActivityFilter
+
+    # === PIPELINE EN PROCESSUS UNIQUE ===
+    # Conversion, diarisation et transcription s'enchaînent fichier par fichier :
+    # le fichier N+1 est diarisé pendant que le fichier N est transcrit.
+    print("\n========== DIARISATION + TRANSCRIPTION ==========")
+    runner = PipelineRunner(
+        args.input, args.output,
+        model=args.model, language=args.lang, gpu=args.gpu, queue_size=args.queue_size,
+        transcribe_options={
+            "batch_size": args.batch_size,
+            "batch_seconds": args.batch_seconds,
+            "merge_gap": args.merge_gap,
+            "max_segment": args.max_segment,
+            "min_segment": args.min_segment,
+            "single_pass": args.single_pass,
+            "vad": VoiceActivityFilter(
+                args.vad_threshold, args.vad_margin, args.vad_zcr, args.vad_padding, args.vad_min_speech, args.vad_debug
+            ) if args.vad else None,
+            "formats": args.formats,
+        },
+        cache=None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size * 1024 ** 2),
+        cpu_optimized=args.cpu_optimized,
+        model_cache_dir=args.cache_dir,
+        cost_model=load_cost_model(args.cache_dir),
+        stream=args.stream,
+        keep_wav=args.keep_wav,
+        window=args.window,
+        window_overlap=args.window_overlap,
+        stitch_threshold=args.stitch_threshold,
+        speakers=(args.num_speakers, args.min_speakers, args.max_speakers),
+        clustering_threshold=args.clustering_threshold,
+    )
+    with metrics.MetricsSession(args):
+        if args.watch:
+            from transcriber.watch import serve
+            os.makedirs(args.input, exist_ok=True)
+            stages = serve(runner, args.watch_interval, args.watch_settle, args.watch_polling)
+        else:
+            stages = runner.run()
+
+    if any(stage.failed for stage in stages):
+        print("\n❌ Processus terminé avec des erreurs.")
+        sys.exit(1)
+
+    print("\n✅ Processus complet terminé avec succès.")
+
+if __name__ == "__main__":
+    main()
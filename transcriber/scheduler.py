@@ -0,0 +1,202 @@
+import heapq
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from transcriber.defaults import COST_HISTORY_SIZE, DEFAULT_RTF, ETA_INTERVAL
+
+HISTORY_FILE = "cost_history.json"
+
+
+def device_label(gpu=False, cpu_optimized=False, workers=1):
+    # Le coût mesuré dépend du matériel et du partage des cœurs entre workers
+    if gpu:
+        return "cuda"
+    return "cpu" + ("-int8" if cpu_optimized else "") + (f"-x{workers}" if workers > 1 else "")
+
+
+def count_segments(rttm_path):
+    with open(rttm_path) as f:
+        return sum(1 for line in f if line.startswith("SPEAKER"))
+
+
+# === MODÈLE DE COÛT ===
+# Historique local des mesures (durée audio, segments, secondes) par étape,
+# modèle et matériel. Le coût d'un fichier est ajusté par moindres carrés
+# sur `a × durée + b × segments` ; avec trop peu de mesures, on applique le
+# facteur temps réel moyen, et sans historique un facteur par défaut.
+class CostModel:
+    def __init__(self, path, history_size=COST_HISTORY_SIZE):
+        self.path = path
+        self.history_size = history_size
+        self.lock = threading.Lock()
+        self.new_samples = {}
+        self.history = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def key(stage, model, device):
+        return f"{stage}/{model}/{device}"
+
+    def record(self, stage, model, device, duration, segments, seconds):
+        if duration <= 0:
+            return
+        sample = [round(duration, 3), int(segments or 0), round(seconds, 4)]
+        key = self.key(stage, model, device)
+        with self.lock:
+            self.history.setdefault(key, []).append(sample)
+            self.history[key] = self.history[key][-self.history_size:]
+            self.new_samples.setdefault(key, []).append(sample)
+
+    def rtf(self, stage, model, device):
+        samples = self.history.get(self.key(stage, model, device))
+        if not samples:
+            return None
+        duration, _, seconds = np.asarray(samples, dtype=np.float64).T
+        return float(seconds.sum() / duration.sum())
+
+    def predict(self, stage, model, device, duration, segments=None):
+        samples = self.history.get(self.key(stage, model, device))
+        if not samples:
+            return duration * DEFAULT_RTF.get(stage, 1.0)
+        durations, counts, seconds = np.asarray(samples, dtype=np.float64).T
+        if segments is None:
+            # Segments inconnus (avant diarisation) : densité moyenne observée
+            segments = duration * counts.sum() / durations.sum()
+        if len(samples) >= 4:
+            coefs, _, rank, _ = np.linalg.lstsq(np.column_stack([durations, counts]), seconds, rcond=None)
+            if rank == 2 and (coefs >= 0).all():
+                return float(coefs[0] * duration + coefs[1] * segments)
+        return float(seconds.sum() / durations.sum() * duration)
+
+    def save(self):
+        # Relecture puis ajout des seules nouvelles mesures : deux exécutions
+        # concurrentes ne s'écrasent pas leurs historiques.
+        with self.lock:
+            if not self.new_samples:
+                return
+            history = self._read()
+            for key, samples in self.new_samples.items():
+                history[key] = (history.get(key, []) + samples)[-self.history_size:]
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(history, f)
+            os.replace(tmp_path, self.path)
+            self.history = history
+            self.new_samples = {}
+
+
+def load_cost_model(cache_dir):
+    return CostModel(os.path.join(cache_dir, HISTORY_FILE))
+
+
+# === RÉPARTITION DES FICHIERS (LPT) ===
+def lpt_schedule(costs, workers):
+    # Plus long d'abord, chaque fichier au worker le moins chargé. Renvoie
+    # l'ordre de soumission, l'affectation prévue et la durée totale prévue.
+    # Un pool qui distribue les fichiers un par un dans cet ordre applique la
+    # même règle, en se corrigeant si les durées réelles s'écartent.
+    order = sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)
+    loads = [(0.0, w) for w in range(max(1, workers))]
+    assignment = [[] for _ in loads]
+    for i in order:
+        load, w = heapq.heappop(loads)
+        assignment[w].append(i)
+        heapq.heappush(loads, (load + costs[i], w))
+    return order, assignment, max(load for load, _ in loads)
+
+
+def order_by_cost(items, durations, cost_model, stages, workers=1):
+    # Fichiers d'entrée, avant conversion : coût prévu = somme des étapes
+    # (étape, modèle, matériel) pour la durée annoncée, le nombre de segments
+    # étant estimé d'après l'historique. Renvoie les éléments du plus coûteux
+    # au moins coûteux et la durée totale prévue. Durée inconnue : en dernier.
+    costs = [
+        sum(cost_model.predict(stage, model, device, duration) for stage, model, device in stages) if duration else 0.0
+        for duration in durations
+    ]
+    order, _, makespan = lpt_schedule(costs, workers)
+    return [items[i] for i in order], makespan
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600} h {seconds % 3600 // 60:02d} min"
+    return f"{seconds // 60} min {seconds % 60} sec"
+
+
+# === TEMPS RESTANT EN DIRECT ===
+# Coût restant = coût prévu de chaque fichier × part non encore transcrite,
+# corrigé par le rapport temps réel / temps prévu des fichiers terminés.
+class EtaTracker:
+    def __init__(self, costs, workers=1, interval=ETA_INTERVAL):
+        self.predicted = dict(costs)
+        self.remaining = dict(costs)
+        self.workers = max(1, workers)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.actual = 0.0
+        self.expected = 0.0
+        self.last_report = time.time()
+
+    def eta(self):
+        scale = self.actual / self.expected if self.expected else 1.0
+        remaining = [cost for cost in self.remaining.values() if cost > 0]
+        return scale * max(sum(remaining) / self.workers, max(remaining, default=0.0))
+
+    def progress(self):
+        total = sum(self.predicted.values())
+        return 1 - sum(self.remaining.values()) / total if total else 1.0
+
+    def update(self, job, done, total):
+        with self.lock:
+            self.remaining[job] = self.predicted[job] * (1 - done / max(total, 1))
+            if time.time() - self.last_report >= self.interval:
+                self._report()
+
+    def finish(self, job, seconds):
+        with self.lock:
+            self.remaining[job] = 0.0
+            self.actual += seconds
+            self.expected += self.predicted[job]
+            self._report()
+
+    def _report(self):
+        from tqdm import tqdm
+        self.last_report = time.time()
+        tqdm.write(f"⏱️ Reste estimé : {format_duration(self.eta())} ({100 * self.progress():.0f} % du lot)")
+
+
+# === PLANIFICATION D'UN LOT DE TRANSCRIPTIONS ===
+class TranscriptionPlan:
+    def __init__(self, jobs, cost_model, model, device, workers=1):
+        # jobs : (WAV, RTTM, dossier de sortie, durée audio)
+        self.cost_model = cost_model
+        self.model = model
+        self.device = device
+        self.segments = {job[0]: count_segments(job[1]) for job in jobs}
+        costs = [cost_model.predict("transcribe", model, device, job[3], self.segments[job[0]]) for job in jobs]
+        order, _, self.makespan = lpt_schedule(costs, workers)
+        self.jobs = [jobs[i] for i in order]
+        self.eta = EtaTracker({job[0]: cost for job, cost in zip(jobs, costs)}, workers)
+        rtf = cost_model.rtf("transcribe", model, device)
+        source = f"RTF mesuré {rtf:.2f}" if rtf is not None else "sans historique"
+        print(f"📅 {len(jobs)} fichier(s), durée prévue : {format_duration(self.makespan)} ({model}, {device}, {source})")
+
+    def progress(self, job):
+        return lambda done, total: self.eta.update(job[0], done, total)
+
+    def done(self, job, seconds):
+        self.cost_model.record("transcribe", self.model, self.device, job[3], self.segments[job[0]], seconds)
+        self.eta.finish(job[0], seconds)
@@ -0,0 +1,80 @@
+from pyannote.core import Segment
+
+from transcriber.defaults import MAX_SEGMENT_DURATION, MERGE_GAP, MIN_SEGMENT_DURATION
+
+
+# === FUSION DES TOURS CONSÉCUTIFS D'UN MÊME LOCUTEUR ===
+def _merge(segments, max_gap, max_duration):
+    merged = []
+    for segment, speaker in segments:
+        if merged:
+            last, last_speaker = merged[-1]
+            if (
+                speaker == last_speaker
+                and segment.start - last.end < max_gap
+                and max(last.end, segment.end) - last.start <= max_duration
+            ):
+                merged[-1] = (Segment(last.start, max(last.end, segment.end)), speaker)
+                continue
+        merged.append((segment, speaker))
+    return merged
+
+
+# === RATTACHEMENT DES FRAGMENTS COURTS ===
+def _attach_short(segments, min_duration, max_duration):
+    # Un fragment plus court que min_duration est rattaché au tour voisin le
+    # plus proche dans le temps, étendu pour le couvrir : son texte n'est pas
+    # perdu. Il reste seul si aucun voisin ne peut l'absorber sans dépasser
+    # max_duration.
+    segments = list(segments)
+    planned, attached = [], 0
+    for i, (segment, speaker) in enumerate(segments):
+        if segment.duration >= min_duration:
+            planned.append((segment, speaker))
+            continue
+        sides = []
+        if planned:
+            sides.append((segment.start - planned[-1][0].end, "previous"))
+        if i + 1 < len(segments):
+            sides.append((segments[i + 1][0].start - segment.end, "next"))
+        for _, side in sorted(sides):
+            neighbour, neighbour_speaker = planned[-1] if side == "previous" else segments[i + 1]
+            span = Segment(min(neighbour.start, segment.start), max(neighbour.end, segment.end))
+            if span.duration > max_duration:
+                continue
+            if side == "previous":
+                planned[-1] = (span, neighbour_speaker)
+            else:
+                segments[i + 1] = (span, neighbour_speaker)
+            attached += 1
+            break
+        else:
+            planned.append((segment, speaker))
+    return planned, attached
+
+
+# === PLANIFICATION AVANT TRANSCRIPTION ===
+def plan_segments(segments, max_gap=MERGE_GAP, max_duration=MAX_SEGMENT_DURATION, min_duration=MIN_SEGMENT_DURATION):
+    # segments : liste de (Segment, locuteur) triée par début, comme
+    # annotation.itersegments(with_label=True).
+    # 1. fusion des tours proches ; 2. rattachement des fragments trop courts
+    # restés isolés à leur voisin ; 3. nouvelle fusion des tours devenus
+    # adjacents. Avec les valeurs par défaut (0), les tours sont gardés tels quels.
+    merged = _merge(segments, max_gap, max_duration)
+    kept, attached = _attach_short(merged, min_duration, max_duration)
+    planned = _merge(kept, max_gap, max_duration)
+
+    stats = {
+        "input": len(segments),
+        "output": len(planned),
+        "attached": attached,
+        "saved": len(segments) - len(planned),
+    }
+    return planned, stats
+
+
+def format_plan_stats(stats):
+    return (
+        f"🧩 Planification : {stats['input']} → {stats['output']} segments "
+        f"({stats['saved']} appels Whisper évités, dont {stats['attached']} fragments rattachés à un voisin)"
+    )
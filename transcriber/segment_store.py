@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+
+
+# === TABLE DE SEGMENTS EN COLONNES ===
+# Un RTTM (ou un dossier entier de RTTM) tient dans quelques tableaux NumPy :
+# début, fin, identifiant de locuteur et identifiant de fichier. Les libellés
+# ne sont stockés qu'une fois (`speakers`, `uris`) ; les objets pyannote ne
+# sont créés qu'à la demande (to_annotation, itersegments).
+RTTM_FIELDS = 10
+RTTM_LINE = "SPEAKER %s 1 %.3f %.3f <NA> <NA> %s <NA> <NA>\n"
+
+
+def _intern(values):
+    # Libellés uniques triés et identifiant entier de chaque valeur
+    labels = sorted(set(values))
+    index = {label: i for i, label in enumerate(labels)}
+    return np.array(labels, dtype=str), np.array([index[value] for value in values], dtype=np.int32)
+
+
+def _rttm_columns(text):
+    # Cas courant : 10 champs par ligne, colonnes extraites par tranches de
+    # la liste de jetons puis converties d'un bloc par NumPy ; sinon
+    # (variantes à 9 champs, autres types de ligne) lecture ligne par ligne.
+    tokens = text.split()
+    rows = len(tokens) // RTTM_FIELDS
+    if len(tokens) % RTTM_FIELDS == 0 and tokens[0::RTTM_FIELDS].count("SPEAKER") == rows:
+        columns = tokens[3::RTTM_FIELDS], tokens[4::RTTM_FIELDS], tokens[7::RTTM_FIELDS]
+    else:
+        lines = [line.split() for line in text.splitlines()]
+        lines = [line for line in lines if len(line) >= 8 and line[0] == "SPEAKER"]
+        columns = [line[3] for line in lines], [line[4] for line in lines], [line[7] for line in lines]
+    starts, durations, labels = columns
+    return np.array(starts, dtype=np.float64), np.array(durations, dtype=np.float64), labels
+
+
+class SegmentStore:
+    def __init__(self, start, end, speaker_ids, speakers, uri_ids=None, uris=None):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.speaker_ids = np.asarray(speaker_ids, dtype=np.int32)
+        self.speakers = np.asarray(speakers, dtype=str)
+        self.uri_ids = np.zeros(len(self.start), dtype=np.int32) if uri_ids is None else np.asarray(uri_ids, dtype=np.int32)
+        self.uris = np.asarray(["<NA>"] if uris is None else uris, dtype=str)
+
+    def __len__(self):
+        return len(self.start)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    # === LECTURE / ÉCRITURE RTTM ===
+    @classmethod
+    def from_rttm(cls, rttm_path, uri=None):
+        # `uri` : nom du fichier sans extension par défaut, comme pour le WAV associé
+        with open(rttm_path, "r") as f:
+            text = f.read()
+        start, durations, labels = _rttm_columns(text)
+        speakers, speaker_ids = _intern(labels)
+        uri = uri or os.path.splitext(os.path.basename(rttm_path))[0]
+        return cls(start, start + durations, speaker_ids, speakers, uris=[uri]).sorted()
+
+    @classmethod
+    def from_directory(cls, folder, suffix=".rttm"):
+        # Mode archive : tous les RTTM d'un dossier dans une seule table, un
+        # identifiant de fichier par RTTM ; un seul passage NumPy pour tout.
+        names = sorted(name for name in os.listdir(folder) if name.endswith(suffix))
+        columns, uri_ids = [], []
+        for i, name in enumerate(names):
+            with open(os.path.join(folder, name), "r") as f:
+                starts, durations, labels = _rttm_columns(f.read())
+            columns.append((starts, durations, labels))
+            uri_ids.append(np.full(len(starts), i, dtype=np.int32))
+        if not columns:
+            return cls([], [], [], [], uris=[])
+        start = np.concatenate([c[0] for c in columns])
+        end = start + np.concatenate([c[1] for c in columns])
+        speakers, speaker_ids = _intern([label for c in columns for label in c[2]])
+        uris = [os.path.splitext(name)[0] for name in names]
+        return cls(start, end, speaker_ids, speakers, np.concatenate(uri_ids), uris).sorted()
+
+    def write_rttm(self, rttm_path):
+        rows = zip(
+            self.uris[self.uri_ids].tolist(), self.start.tolist(),
+            self.duration.tolist(), self.speakers[self.speaker_ids].tolist(),
+        )
+        tmp_path = rttm_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("".join(map(RTTM_LINE.__mod__, rows)))
+        os.replace(tmp_path, rttm_path)
+
+    # === CONVERSION PYANNOTE (À LA DEMANDE) ===
+    @classmethod
+    def from_annotation(cls, annotation):
+        tracks = list(annotation.itertracks(yield_label=True))
+        speakers, speaker_ids = _intern([label for _, _, label in tracks])
+        return cls(
+            [segment.start for segment, _, _ in tracks], [segment.end for segment, _, _ in tracks],
+            speaker_ids, speakers, uris=[annotation.uri or "<NA>"],
+        )
+
+    def to_annotation(self, uri=None):
+        from pyannote.core import Annotation, Segment
+        annotation = Annotation(uri=uri or (self.uris[0] if len(self.uris) == 1 else None))
+        labels = self.speakers[self.speaker_ids].tolist()
+        for i, (start, end) in enumerate(zip(self.start.tolist(), self.end.tolist())):
+            annotation[Segment(start, end), i] = labels[i]
+        return annotation
+
+    def itersegments(self):
+        # (Segment, locuteur) triés par début : l'entrée de plan_segments
+        from pyannote.core import Segment
+        labels = self.speakers[self.speaker_ids].tolist()
+        return [(Segment(start, end), label) for start, end, label in zip(self.start.tolist(), self.end.tolist(), labels)]
+
+    # === REQUÊTES ===
+    def select(self, mask):
+        # Sous-table (masque booléen ou indices) ; les tables de libellés sont partagées
+        return SegmentStore(self.start[mask], self.end[mask], self.speaker_ids[mask], self.speakers,
+                            self.uri_ids[mask], self.uris)
+
+    def sorted(self):
+        return self.select(np.lexsort((self.end, self.start, self.uri_ids)))
+
+    def for_speaker(self, label):
+        ids = np.flatnonzero(self.speakers == label)
+        return self.select(np.isin(self.speaker_ids, ids))
+
+    def for_uri(self, uri):
+        ids = np.flatnonzero(self.uris == uri)
+        return self.select(np.isin(self.uri_ids, ids))
+
+    def overlapping(self, start, end):
+        # Segments qui recoupent [start, end[
+        return self.select((self.start < end) & (self.end > start))
+
+    def crop(self, start, end):
+        # Comme overlapping, avec les bornes ramenées dans [start, end]
+        window = self.overlapping(start, end)
+        window.start = np.maximum(window.start, start)
+        window.end = np.minimum(window.end, end)
+        return window
+
+    def speaker_durations(self):
+        # Temps de parole par locuteur (secondes)
+        totals = np.bincount(self.speaker_ids, weights=self.duration, minlength=len(self.speakers))
+        return dict(zip(self.speakers.tolist(), totals.tolist()))
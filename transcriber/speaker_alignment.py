@@ -0,0 +1,84 @@
+import bisect
+
+from pyannote.core import Segment
+
+
+# === INDEX D'INTERVALLES PAR LOCUTEUR ===
+# L'annotation est aplatie en intervalles élémentaires triés et disjoints ;
+# en cas de chevauchement, le tour commencé le plus récemment l'emporte
+# (interjection). La recherche d'un instant se fait par dichotomie.
+class SpeakerIndex:
+    def __init__(self, annotation):
+        tracks = [(segment.start, segment.end, label) for segment, _, label in annotation.itertracks(yield_label=True)]
+        boundaries = sorted({t for start, end, _ in tracks for t in (start, end)})
+        by_start = sorted(range(len(tracks)), key=lambda i: tracks[i][0])
+        by_end = sorted(range(len(tracks)), key=lambda i: tracks[i][1])
+
+        self.starts, self.ends, self.labels = [], [], []
+        active = {}
+        next_start = next_end = 0
+        for left, right in zip(boundaries, boundaries[1:]):
+            while next_end < len(by_end) and tracks[by_end[next_end]][1] <= left:
+                active.pop(by_end[next_end], None)
+                next_end += 1
+            while next_start < len(by_start) and tracks[by_start[next_start]][0] <= left:
+                start, end, label = tracks[by_start[next_start]]
+                if end > left:
+                    active[by_start[next_start]] = (start, label)
+                next_start += 1
+            if not active:
+                continue
+            label = max(active.values())[1]
+            if self.labels and self.labels[-1] == label and self.ends[-1] == left:
+                self.ends[-1] = right
+            else:
+                self.starts.append(left)
+                self.ends.append(right)
+                self.labels.append(label)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def speaker_at(self, t):
+        # Locuteur actif à l'instant t, ou le plus proche dans le temps
+        if not self.starts:
+            return None
+        i = bisect.bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.labels[i]
+        before = t - self.ends[i] if i >= 0 else float("inf")
+        after = self.starts[i + 1] - t if i + 1 < len(self.starts) else float("inf")
+        return self.labels[i] if before <= after else self.labels[i + 1]
+
+
+# === ALIGNEMENT MOTS → LOCUTEURS ===
+def align_words(words, index):
+    # words : dicts Whisper {"word", "start", "end"} ; produit les tours de
+    # parole (Segment, locuteur, texte) en regroupant les mots consécutifs
+    # attribués au même locuteur. Chaque tour est produit dès que le
+    # locuteur change, sans garder les tours précédents.
+    turn = None
+    for word in words:
+        speaker = index.speaker_at((word["start"] + word["end"]) / 2)
+        if speaker is None:
+            continue
+        if turn and turn[1] == speaker:
+            turn = (turn[0], speaker, turn[2] + [word["word"]], word["end"])
+            continue
+        if turn:
+            yield Segment(turn[0], turn[3]), turn[1], "".join(turn[2]).strip()
+        turn = (word["start"], speaker, [word["word"]], word["end"])
+    if turn:
+        yield Segment(turn[0], turn[3]), turn[1], "".join(turn[2]).strip()
+
+
+# === TRANSCRIPTION EN UNE PASSE ===
+def transcribe_words(model, audio, language):
+    # Un seul appel Whisper sur tout le fichier avec horodatage par mot ;
+    # les mots sont ensuite attribués aux locuteurs par align_words.
+    result = model.transcribe(audio, language=language, fp16=False, word_timestamps=True)
+    return [
+        {"word": word["word"], "start": word["start"], "end": word["end"]}
+        for segment in result["segments"]
+        for word in segment.get("words", [])
+    ]
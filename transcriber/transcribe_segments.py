@@ -0,0 +1,199 @@
+import argparse
+import os
+import time
+
+from transcriber import metrics
+from transcriber.defaults import (
+    BATCH_SECONDS, BATCH_SIZE, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, MAX_SEGMENT_DURATION, MERGE_GAP,
+    MIN_SEGMENT_DURATION, MODEL_MAP, QUEUE_LEASE,
+    OUTPUT_FORMATS, VAD_MARGIN_DB, VAD_MIN_SPEECH, VAD_PADDING, VAD_THRESHOLD_DB, VAD_ZCR_THRESHOLD
+)
+from transcriber.transcript_writer import parse_formats
+
+
+def main():
+    # Charger les variables d'environnement depuis .env
+    from dotenv import load_dotenv
+    load_dotenv()
+    default_input = os.getenv("INPUT_FOLDER", "input")
+    default_output = os.getenv("OUTPUT_FOLDER", "output")
+    default_model = os.getenv("WHISPER_MODEL", "base")
+
+    # === PARSEUR D'ARGUMENTS CLI ===
+    parser = argparse.ArgumentParser(description="Transcription audio multilocuteur avec Whisper")
+    parser.add_argument("--model", type=str, default=default_model, help="Modèle Whisper à utiliser (1=tiny, 2=base, 3=small, 4=medium, 5=large, 6=large-v3)")
+    parser.add_argument("--lang", type=str, default="fr", help="Langue de transcription (ex: 'fr', 'en', 'es')")
+    parser.add_argument("--gpu", action="store_true", help="Force l'utilisation du GPU pour Whisper")
+    parser.add_argument("--output", type=str, default=default_output, help="Dossier où enregistrer les fichiers traités")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Nombre maximal de segments par lot Whisper (1 = segment par segment)")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS, help="Durée audio cumulée maximale par lot (secondes)")
+    parser.add_argument("--merge-gap", type=float, default=MERGE_GAP, help="Fusionne les tours consécutifs d'un même locuteur séparés de moins de N secondes (0 = désactivé)")
+    parser.add_argument("--max-segment", type=float, default=MAX_SEGMENT_DURATION, help="Durée maximale d'un segment fusionné (secondes)")
+    parser.add_argument("--min-segment", type=float, default=MIN_SEGMENT_DURATION, help="Rattache au tour voisin le plus proche les fragments isolés plus courts que N secondes (0 = désactivé)")
+    parser.add_argument("--single-pass", action="store_true", help="Transcrit chaque fichier en une passe et attribue chaque mot à un locuteur")
+    parser.add_argument("--cpu-optimized", action="store_true", help="CPU : couches linéaires de Whisper quantifiées en int8 (mises en cache) et threads torch ajustés aux cœurs physiques")
+    parser.add_argument("--shared-weights", action="store_true", help="CPU : poids Whisper convertis une fois (dans --cache-dir) puis projetés en mémoire, partagés entre processus et chargés quasi instantanément")
+    parser.add_argument("--cache-dir", type=str, default=os.getenv("CACHE_FOLDER", DEFAULT_CACHE_DIR), help="Dossier du cache de transcriptions")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB, help="Taille maximale du cache de transcriptions (Mo)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache de transcriptions")
+    parser.add_argument("--vad", action="store_true", help="Rogne les silences en bord de segment et ignore les segments sans parole avant Whisper")
+    parser.add_argument("--vad-threshold", type=float, default=VAD_THRESHOLD_DB, help="Énergie minimale d'une trame de parole (dB pleine échelle)")
+    parser.add_argument("--vad-margin", type=float, default=VAD_MARGIN_DB, help="Écart minimal au plancher de bruit du fichier (dB)")
+    parser.add_argument("--vad-zcr", type=float, default=VAD_ZCR_THRESHOLD, help="Taux de passage par zéro au-delà duquel une trame plus faible compte comme parole (fricatives)")
+    parser.add_argument("--vad-padding", type=float, default=VAD_PADDING, help="Marge conservée autour de la parole détectée (secondes)")
+    parser.add_argument("--vad-min-speech", type=float, default=VAD_MIN_SPEECH, help="Parole minimale pour transcrire un segment (secondes)")
+    parser.add_argument("--vad-debug", action="store_true", help="Écrit <nom>.vad.rttm avec les zones retirées par le VAD")
+    parser.add_argument("--formats", type=parse_formats, default=",".join(OUTPUT_FORMATS), help="Formats de transcription écrits au fil de l'eau, séparés par des virgules (txt, jsonl, srt, vtt)")
+    parser.add_argument("--shared", action="store_true", help="Mode distribué : plusieurs workers (machines ou processus) se partagent --output via des baux dans <output>/.claims")
+    parser.add_argument("--input", type=str, default=default_input, help="Avec --shared, dossier d'entrée de la diarisation : le worker attend que ses fichiers soient diarisés")
+    parser.add_argument("--lease", type=float, default=QUEUE_LEASE, help="Avec --shared, délai sans signe de vie avant reprise d'un fichier par un autre worker (secondes)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Imports lourds (torch, whisper, pyannote) après l'analyse des arguments
+    from transcriber.cpu_inference import load_model, text_variant, tune_threads
+    from transcriber.scheduler import TranscriptionPlan, device_label, load_cost_model
+    from transcriber.transcript_cache import TranscriptCache
+    from transcriber.transcription import transcribe_file
+    from transcriber.vad import VoiceActivityFilter
+    from transcriber.workers import get_duration
+
+    # === CONFIG ===
+    OUTPUT_DIR = args.output  # Utilisation de l'argument CLI ou de la valeur par défaut depuis .env
+    TRANSCRIPTS_DIR = os.path.join(OUTPUT_DIR, "transcripts")  # Créer transcripts dans output
+    os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+
+    print(f"📂 Dossier des fichiers RTTM : {os.path.abspath(OUTPUT_DIR)}")
+    print(f"📂 Dossier des transcriptions : {os.path.abspath(TRANSCRIPTS_DIR)}")
+
+    # === CHOIX DU MODÈLE WHISPER ===
+    model_name = MODEL_MAP.get(args.model, default_model)
+
+    print(f"\n🧠 Chargement du modèle Whisper '{model_name}'...")
+    device = "cuda" if args.gpu else "cpu"
+    if args.cpu_optimized and device == "cpu":
+        print(f"🧵 {tune_threads()} threads torch")
+    model = load_model(model_name, device=device, cpu_optimized=args.cpu_optimized, cache_dir=args.cache_dir,
+                       shared_weights=args.shared_weights)
+    print(f"✅ Modèle prêt sur {device.upper()}.")
+
+    # === LANGUE DE TRANSCRIPTION ===
+    language = args.lang
+    print(f"🌍 Langue sélectionnée : {language}")
+
+    # === CACHE ET OPTIONS DE TRANSCRIPTION ===
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size * 1024 ** 2)
+    options = {
+        "batch_size": args.batch_size,
+        "batch_seconds": args.batch_seconds,
+        "merge_gap": args.merge_gap,
+        "max_segment": args.max_segment,
+        "min_segment": args.min_segment,
+        "single_pass": args.single_pass,
+        "language": language,
+        "model_name": text_variant(model_name, device, args.cpu_optimized),
+        "cache": cache,
+        "vad": VoiceActivityFilter(
+            args.vad_threshold, args.vad_margin, args.vad_zcr, args.vad_padding, args.vad_min_speech, args.vad_debug
+        ) if args.vad else None,
+        "formats": args.formats,
+    }
+
+    if args.shared:
+        with metrics.MetricsSession(args):
+            transcribe_shared(args, OUTPUT_DIR, TRANSCRIPTS_DIR, model, model_name, options, device_label(args.gpu, args.cpu_optimized))
+        return
+
+    # === LISTAGE DES FICHIERS RTTM ===
+    files = [f for f in os.listdir(OUTPUT_DIR) if f.endswith(".rttm")]
+
+    # Si aucun fichier RTTM n'est trouvé dans OUTPUT_DIR, quitter proprement
+    if not files:
+        print(f"❌ Aucun fichier RTTM trouvé dans '{OUTPUT_DIR}'. Assurez-vous d'avoir des fichiers RTTM prêts à être transcrits.")
+        return
+
+    print(f"🎯 {len(files)} fichier(s) RTTM détecté(s) à transcrire.\n")
+
+    jobs = []
+    for rttm_file in files:
+        base_name = rttm_file.replace(".rttm", "")
+        audio_path = os.path.join(OUTPUT_DIR, base_name + ".wav")
+        rttm_path = os.path.join(OUTPUT_DIR, rttm_file)
+
+        if not os.path.exists(audio_path):
+            print(f"❌ Audio manquant pour {rttm_file}. Ignoré.")
+            continue
+        jobs.append((audio_path, rttm_path, TRANSCRIPTS_DIR, get_duration(audio_path)))
+
+    # === ORDRE DE TRAITEMENT (MODÈLE DE COÛT) ===
+    cost_model = load_cost_model(args.cache_dir)
+    plan = TranscriptionPlan(jobs, cost_model, model_name, device_label(args.gpu, args.cpu_optimized))
+
+    # === TRAITEMENT DE TOUS LES FICHIERS ===
+    with metrics.MetricsSession(args):
+        try:
+            for job in plan.jobs:
+                audio_path, rttm_path = job[0], job[1]
+                base_name = os.path.splitext(os.path.basename(audio_path))[0]
+                print(f"\n🎙️  Transcription de : {base_name}")
+
+                # Décodage unique du WAV, segments planifiés et transcrits par lots ;
+                # le journal permet de reprendre un fichier interrompu.
+                start = time.time()
+                transcribe_file(audio_path, rttm_path, TRANSCRIPTS_DIR, model, progress=plan.progress(job), **options)
+                plan.done(job, time.time() - start)
+        finally:
+            cost_model.save()
+
+    print("\n🎉 Tous les fichiers ont été transcrits avec succès.")
+
+
+def transcribe_shared(args, output_dir, transcripts_dir, model, model_name, options, device):
+    # Un fichier est prêt quand son RTTM et son WAV existent et qu'aucun
+    # worker de diarisation ne le détient ; le worker s'arrête quand il n'y a
+    # plus rien à transcrire, ni à diariser (fichiers de --input en attente
+    # ou en cours), dans le dossier partagé.
+    from transcriber.scheduler import count_segments, load_cost_model
+    from transcriber.transcription import transcribe_file
+    from transcriber.work_queue import WorkQueue, file_signature, list_files
+    from transcriber.workers import get_duration
+
+    queue = WorkQueue(output_dir, "transcribe", args.lease)
+    upstream = WorkQueue(output_dir, "diarize", args.lease)
+    print(f"\n🤝 Mode distribué : worker {queue.worker}, baux dans {queue.folder}")
+
+    def pending():
+        # Signature du RTTM : une nouvelle diarisation du même nom est retranscrite
+        ready = {}
+        for rttm_file in os.listdir(output_dir):
+            name = rttm_file[:-len(".rttm")]
+            if (rttm_file.endswith(".rttm") and os.path.exists(os.path.join(output_dir, name + ".wav"))
+                    and upstream.owner(name) is None):
+                try:
+                    ready[name] = (file_signature(os.path.join(output_dir, rttm_file)), rttm_file)
+                except FileNotFoundError:
+                    pass
+        return ready
+
+    cost_model = load_cost_model(args.cache_dir)
+    done = 0
+    try:
+        diarize_pending = (lambda: list_files(args.input)) if os.path.isdir(args.input) else dict
+        for name, rttm_file in queue.claims(pending, upstream=[(upstream, diarize_pending)]):
+            with queue.hold(name):
+                audio_path = os.path.join(output_dir, name + ".wav")
+                rttm_path = os.path.join(output_dir, rttm_file)
+                print(f"\n🎙️  Transcription de : {name} ({queue.worker})")
+                start = time.time()
+                transcribe_file(audio_path, rttm_path, transcripts_dir, model, **options)
+                cost_model.record("transcribe", model_name, device, get_duration(audio_path),
+                                  count_segments(rttm_path), time.time() - start)
+                cost_model.save()
+                done += 1
+    finally:
+        queue.close()
+        upstream.close()
+    print(f"\n🎉 Plus aucun fichier à transcrire : {done} fichier(s) transcrit(s) par ce worker.")
+
+if __name__ == "__main__":
+    main()
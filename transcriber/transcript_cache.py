@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+
+from transcriber.defaults import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+
+
+def _atomic_write(path, content):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# === CACHE DE TRANSCRIPTIONS ADRESSÉ PAR CONTENU ===
+# Une entrée par segment, indexée par l'empreinte de l'audio, les bornes du
+# segment, le modèle et la langue. L'éviction LRU se fait sur la date de
+# dernier accès (mtime, rafraîchie à chaque lecture) au-delà de `max_bytes`.
+class TranscriptCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.segments_dir = os.path.join(cache_dir, "segments")
+        self.rttm_dir = os.path.join(cache_dir, "rttm")
+        self.max_bytes = max_bytes
+        os.makedirs(self.segments_dir, exist_ok=True)
+        os.makedirs(self.rttm_dir, exist_ok=True)
+        self._size = None
+
+    @staticmethod
+    def segment_key(audio_key, start, end, model_name, language, mode="segment"):
+        raw = f"{audio_key}:{start:.3f}:{end:.3f}:{model_name}:{language}:{mode}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.segments_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, key, value):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = json.dumps(value, ensure_ascii=False)
+        _atomic_write(path, content)
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += len(content.encode("utf-8"))
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for root, _, names in os.walk(self.segments_dir):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # Supprime les entrées les moins récemment utilisées jusqu'à 90 % du quota
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    # === RTTM PAR EMPREINTE AUDIO ===
+    def restore_rttm(self, audio_key, rttm_path):
+        cached = os.path.join(self.rttm_dir, f"{audio_key}.rttm")
+        if not os.path.exists(cached):
+            return False
+        shutil.copyfile(cached, rttm_path)
+        return True
+
+    def store_rttm(self, audio_key, rttm_path):
+        cached = os.path.join(self.rttm_dir, f"{audio_key}.rttm")
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        shutil.copyfile(rttm_path, tmp_path)
+        os.replace(tmp_path, cached)
+
+
+# === JOURNAL DES SEGMENTS TERMINÉS ===
+# Fichier JSONL en ajout seul, écrit et vidé segment par segment : une
+# transcription interrompue reprend là où elle s'est arrêtée. La première
+# ligne décrit les réglages dont dépend le texte (modèle, langue, VAD...) : un
+# journal écrit avec d'autres réglages est ignoré et recommencé.
+class SegmentJournal:
+    def __init__(self, path, header=None):
+        self.path = path
+        self.done = {}
+        header = json.loads(json.dumps(header or {}))
+        complete = True
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                first = f.readline()
+                try:
+                    matches = json.loads(first).get("header") == header
+                except (ValueError, AttributeError):
+                    matches = False
+                if not matches:
+                    print(f"♻️ Journal {os.path.basename(path)} ignoré : réglages de transcription différents")
+                for line in f if matches else ():
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # dernière ligne tronquée par l'interruption
+                    self.done[self._key(entry["start"], entry["end"], entry["speaker"])] = entry["text"]
+            if not matches:
+                os.remove(path)
+        new = not os.path.exists(path)
+        self._file = open(path, "a", encoding="utf-8")
+        if new:
+            self._file.write(json.dumps({"header": header}, ensure_ascii=False) + "\n")
+            self._file.flush()
+        elif not complete:
+            self._file.write("\n")
+
+    @staticmethod
+    def _key(start, end, speaker):
+        return round(start, 3), round(end, 3), speaker
+
+    def get(self, segment, speaker):
+        return self.done.get(self._key(segment.start, segment.end, speaker))
+
+    def record(self, segment, speaker, text):
+        entry = {"start": round(segment.start, 3), "end": round(segment.end, 3), "speaker": speaker, "text": text}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.done[self._key(segment.start, segment.end, speaker)] = text
+
+    def close(self, remove=False):
+        self._file.close()
+        if remove:
+            os.remove(self.path)
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+from datetime import timedelta
+
+FORMATS = ("txt", "jsonl", "srt", "vtt")
+
+
+def format_time(seconds):
+    return str(timedelta(seconds=int(seconds)))
+
+
+def format_timestamp(seconds, separator="."):
+    # HH:MM:SS.mmm (VTT) ou HH:MM:SS,mmm (SRT)
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def parse_formats(value):
+    # "txt,srt" → ("txt", "srt") ; rejette les formats inconnus
+    formats = tuple(dict.fromkeys(name.strip().lower() for name in value.split(",") if name.strip()))
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown or not formats:
+        # ArgumentTypeError : argparse affiche ce message tel quel
+        raise argparse.ArgumentTypeError(f"format(s) inconnu(s) : {', '.join(unknown) or repr(value)} (choix : {', '.join(FORMATS)})")
+    return formats
+
+
+# === MISE EN FORME PAR FORMAT ===
+# Chaque format renvoie le texte d'un segment, avec un éventuel en-tête et
+# un séparateur écrit entre deux segments ; les sous-titres sans texte sont
+# omis. Le .txt reste "\n".join des lignes, sans saut de ligne final.
+def _txt(index, segment, speaker, text):
+    return f"[{format_time(segment.start)} - {format_time(segment.end)}] {speaker.capitalize()}: {text}"
+
+
+def _jsonl(index, segment, speaker, text):
+    entry = {"speaker": speaker, "start": round(segment.start, 3), "end": round(segment.end, 3), "text": text}
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def _srt(index, segment, speaker, text):
+    if not text:
+        return ""
+    start, end = format_timestamp(segment.start, ","), format_timestamp(segment.end, ",")
+    return f"{index}\n{start} --> {end}\n{speaker.capitalize()}: {text}\n\n"
+
+
+def _vtt(index, segment, speaker, text):
+    if not text:
+        return ""
+    return f"{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}\n<v {speaker.capitalize()}>{text}\n\n"
+
+
+FORMATTERS = {"txt": (_txt, "", "\n"), "jsonl": (_jsonl, "", ""), "srt": (_srt, "", ""), "vtt": (_vtt, "WEBVTT\n\n", "")}
+
+
+# === ÉCRITURE EN FLUX ===
+# Chaque segment est ajouté et vidé sur disque dès qu'il est transcrit, dans
+# tous les formats demandés, sans garder le texte en mémoire. Les fichiers
+# restent en `.part` jusqu'à la fin du fichier audio puis sont renommés
+# atomiquement : un `.txt` présent est toujours complet, et après un arrêt
+# brutal le `.part` montre où en était la transcription.
+class TranscriptWriter:
+    def __init__(self, output_path, base_name, formats=("txt",)):
+        self.paths = {name: os.path.join(output_path, f"{base_name}.{name}") for name in formats}
+        self.files = {}
+        self.count = 0
+        self.cues = 0  # numérotation SRT : segments non vides
+        for name, path in self.paths.items():
+            f = open(f"{path}.part", "w", encoding="utf-8")
+            f.write(FORMATTERS[name][1])
+            self.files[name] = f
+
+    def write(self, segment, speaker, text):
+        self.count += 1
+        self.cues += bool(text)
+        for name, f in self.files.items():
+            formatter, _, separator = FORMATTERS[name]
+            f.write((separator if self.count > 1 else "") + formatter(self.cues, segment, speaker, text))
+            f.flush()
+
+    def finalize(self):
+        for name, f in self.files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            os.replace(f"{self.paths[name]}.part", self.paths[name])
+        self.files = {}
+        return list(self.paths.values())
+
+    def close(self):
+        # Interruption : les `.part` sont conservés tels quels
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.close()
@@ -0,0 +1,124 @@
+import itertools
+import os
+import time
+from tqdm import tqdm
+from transcriber.audio_source import SegmentSource, audio_hash
+from transcriber.batch_inference import BatchTranscriber
+from transcriber.defaults import (
+    BATCH_SECONDS, BATCH_SIZE, MAX_SEGMENT_DURATION, MERGE_GAP, MIN_SEGMENT_DURATION, OUTPUT_FORMATS
+)
+from transcriber.metrics import METRICS
+from transcriber.speaker_alignment import SpeakerIndex, align_words, transcribe_words
+from transcriber.segment_planner import format_plan_stats, plan_segments
+from transcriber.segment_store import SegmentStore
+from transcriber.transcript_cache import SegmentJournal
+from transcriber.transcript_writer import TranscriptWriter
+from transcriber.vad import format_vad_stats, write_removed_rttm
+
+def transcribe_file(audio_path, rttm_path, output_path, model, batch_size=BATCH_SIZE, batch_seconds=BATCH_SECONDS,
+                    merge_gap=MERGE_GAP, max_segment=MAX_SEGMENT_DURATION, min_segment=MIN_SEGMENT_DURATION,
+                    single_pass=False, language="fr", model_name=None, cache=None, source=None, audio_key=None,
+                    vad=None, progress=None, formats=OUTPUT_FORMATS):
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    store = SegmentStore.from_rttm(rttm_path)
+
+    start_time = time.time()
+    # `source` : audio déjà décodé en mémoire (mode flux), sinon lecture du WAV
+    if source is None:
+        with METRICS.timer("extract"):
+            source = SegmentSource.from_wav(audio_path)
+    if cache and audio_key is None:
+        audio_key = audio_hash(audio_path)
+    if single_pass:
+        # Les mots (sortie Whisper seule) sont mis en cache, l'alignement
+        # sur les locuteurs est refait à partir du RTTM courant.
+        key = cache.segment_key(audio_key, 0.0, source.duration, model_name, language, mode="words") if cache else None
+        words = cache.get(key) if cache else None
+        if words is None:
+            with METRICS.timer("inference", mode="single_pass"):
+                words = transcribe_words(model, source.audio, language)
+            if cache:
+                cache.put(key, words)
+        with TranscriptWriter(output_path, base_name, formats) as writer:
+            for segment, speaker, transcript in align_words(words, SpeakerIndex(store.to_annotation())):
+                with METRICS.timer("write"):
+                    writer.write(segment, speaker, transcript)
+    else:
+        segments = store.itersegments()
+        segments, plan_stats = plan_segments(segments, merge_gap, max_segment, min_segment)
+        print(format_plan_stats(plan_stats))
+
+        # Filtre de parole : Whisper ne reçoit que la partie parlée de chaque
+        # segment ; le texte garde les horodatages de la diarisation.
+        windows = [segment for segment, _ in segments]
+        if vad:
+            with METRICS.timer("vad"):
+                windows, vad_stats, removed = vad.apply(source.audio, segments)
+            print(format_vad_stats(vad_stats))
+            METRICS.count("vad_removed_seconds_total", vad_stats["removed_s"])
+            METRICS.count("vad_skipped_segments_total", vad_stats["skipped"])
+            if vad.debug:
+                write_removed_rttm(removed, os.path.join(output_path, f"{base_name}.vad.rttm"), base_name)
+            kept = [i for i, window in enumerate(windows) if window is not None]
+            segments = [segments[i] for i in kept]
+            windows = [windows[i] for i in kept]
+
+        # Reprise : chaque segment est cherché dans le journal puis dans le
+        # cache quand il est atteint ; seuls les segments inconnus sont
+        # extraits, un lot Whisper à la fois. Réglages dont dépend le texte :
+        # un journal d'une autre configuration est ignoré.
+        journal = SegmentJournal(os.path.join(output_path, f"{base_name}.journal.jsonl"), {
+            "model": model_name, "language": language,
+            "vad": {name: value for name, value in vars(vad).items() if name != "debug"} if vad else None,
+        })
+
+        def lookups():
+            for (segment, speaker), window in zip(segments, windows):
+                text, origin, key = journal.get(segment, speaker), "journal", None
+                if text is None and cache:
+                    key = cache.segment_key(audio_key, window.start, window.end, model_name, language)
+                    text, origin = cache.get(key), "cache"
+                yield segment, speaker, window, key, text, origin
+
+        def chunks(pending):
+            for _, _, window, _, text, _ in pending:
+                if text is None:
+                    with METRICS.timer("extract"):
+                        chunk = source.segment(window)
+                    yield chunk
+
+        # Deux lectures des mêmes recherches : l'extraction n'a d'avance sur
+        # l'écriture que le lot Whisper en cours. Chaque texte est écrit dès
+        # qu'il est connu (journal, cache ou Whisper) puis oublié.
+        entries, pending = itertools.tee(lookups())
+        engine = BatchTranscriber(model, language, batch_size=batch_size, batch_seconds=batch_seconds)
+        new_texts = engine.iter_texts(chunks(pending))
+        reused = {"journal": 0, "cache": 0}
+        progress_bar = tqdm(total=len(segments), desc=f"⏳ {base_name}", unit="seg")
+        with TranscriptWriter(output_path, base_name, formats) as writer:
+            for done, (segment, speaker, _, key, text, origin) in enumerate(entries, 1):
+                if text is None:
+                    text = next(new_texts)
+                    journal.record(segment, speaker, text)
+                    if cache:
+                        cache.put(key, text)
+                else:
+                    reused[origin] += 1
+                with METRICS.timer("write"):
+                    writer.write(segment, speaker, text)
+                progress_bar.update(1)
+                if progress:
+                    progress(done, len(segments))
+        progress_bar.close()
+        for origin, count in reused.items():
+            METRICS.count("segments_reused_total", count, source=origin)
+        if any(reused.values()):
+            print(f"♻️ {reused['journal']} segment(s) repris du journal, {reused['cache']} depuis le cache")
+        journal.close(remove=True)
+    METRICS.count("files_total", stage="transcribe")
+    METRICS.count("audio_seconds_total", source.duration)
+
+    elapsed = time.time() - start_time
+    total_time = int(elapsed)
+    print(f"\n✅ {base_name} terminé en {total_time // 60} min {total_time % 60} sec ({writer.count / max(elapsed, 1e-6):.2f} seg/s)")
+    print(f"📝 Fichier(s) : {', '.join(writer.paths.values())}")
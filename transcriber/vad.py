@@ -0,0 +1,131 @@
+import numpy as np
+
+from transcriber.defaults import (
+    SAMPLE_RATE, VAD_MARGIN_DB, VAD_MIN_SPEECH, VAD_PADDING, VAD_THRESHOLD_DB, VAD_ZCR_THRESHOLD
+)
+
+FRAME_SECONDS = 0.02
+FRAME = int(SAMPLE_RATE * FRAME_SECONDS)
+
+
+# === ÉNERGIE ET PASSAGES PAR ZÉRO PAR TRAME ===
+def frame_features(audio, block_frames=30000):
+    # Trames de 20 ms sans recouvrement ; calcul par blocs (10 min) pour ne
+    # pas doubler la mémoire sur les fichiers de plusieurs heures.
+    n = len(audio) // FRAME
+    energy_db = np.empty(n, dtype=np.float32)
+    zcr = np.empty(n, dtype=np.float32)
+    for first in range(0, n, block_frames):
+        last = min(n, first + block_frames)
+        frames = audio[first * FRAME:last * FRAME].reshape(-1, FRAME)
+        power = np.einsum("ij,ij->i", frames, frames) / FRAME
+        energy_db[first:last] = 10 * np.log10(power + 1e-10)
+        zcr[first:last] = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / FRAME
+    return energy_db, zcr
+
+
+# === FILTRE DE PAROLE AVANT WHISPER ===
+# Une trame est de la parole si son énergie dépasse le plancher de bruit du
+# fichier (10e centile) d'une marge donnée, ou si elle est un peu plus faible
+# mais à fort taux de passage par zéro (fricatives). Le seuil reste au moins
+# deux marges sous le niveau de la parole (95e centile) : sur un fichier
+# presque sans silence, le 10e centile est déjà de la parole et ne doit pas
+# servir de plancher. Sur un enregistrement bruité (rapport signal/bruit
+# inférieur à deux marges), le filtre garde donc tout. Le masque est élargi de
+# `padding` de chaque côté, puis chaque segment est rogné à sa première et
+# dernière trame de parole, ou ignoré s'il en contient moins que `min_speech`.
+class VoiceActivityFilter:
+    def __init__(self, threshold_db=VAD_THRESHOLD_DB, margin_db=VAD_MARGIN_DB, zcr_threshold=VAD_ZCR_THRESHOLD,
+                 padding=VAD_PADDING, min_speech=VAD_MIN_SPEECH, debug=False):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.zcr_threshold = zcr_threshold
+        self.padding = padding
+        self.min_speech = min_speech
+        self.debug = debug
+
+    def speech_mask(self, audio):
+        energy_db, zcr = frame_features(audio)
+        if not len(energy_db):
+            return np.zeros(0, dtype=bool)
+        floor, speech_level = np.percentile(energy_db, [10, 95])
+        threshold = max(self.threshold_db, min(floor + self.margin_db, speech_level - 2 * self.margin_db))
+        return (energy_db > threshold) | ((zcr > self.zcr_threshold) & (energy_db > threshold - self.margin_db / 2))
+
+    def _dilate(self, speech):
+        # Parole à moins de `padding` : sommes cumulées, sans boucle sur les trames
+        pad = int(round(self.padding / FRAME_SECONDS))
+        if not pad:
+            return speech
+        counts = np.concatenate(([0], np.cumsum(speech)))
+        index = np.arange(len(speech))
+        return counts[np.minimum(index + pad + 1, len(speech))] > counts[np.maximum(index - pad, 0)]
+
+    def apply(self, audio, segments):
+        # segments : (Segment, locuteur). Renvoie pour chacun la fenêtre audio
+        # à transcrire (None = ignoré), les statistiques et les zones retirées
+        # (début, fin, locuteur, motif) pour le RTTM de contrôle.
+        from pyannote.core import Segment
+
+        speech = self.speech_mask(audio)
+        n = len(speech)
+        starts = np.array([segment.start for segment, _ in segments], dtype=np.float64)
+        ends = np.array([segment.end for segment, _ in segments], dtype=np.float64)
+        first_frame = np.clip(np.floor(starts / FRAME_SECONDS).astype(np.int64), 0, n)
+        end_frame = np.clip(np.ceil(ends / FRAME_SECONDS).astype(np.int64), 0, n)
+
+        # Décision sur la parole détectée, rognage sur le masque élargi
+        counts = np.concatenate(([0], np.cumsum(speech)))
+        voiced = counts[end_frame] - counts[np.minimum(first_frame, end_frame)]
+        speech = self._dilate(speech)
+        index = np.arange(n + 1)
+        # Prochaine trame de parole à partir de i, dernière trame de parole jusqu'à i
+        next_speech = np.minimum.accumulate(np.where(np.append(speech, True), index, n)[::-1])[::-1]
+        prev_speech = np.maximum.accumulate(np.where(np.append(speech, False), index, -1))
+        keep = voiced * FRAME_SECONDS >= max(self.min_speech, FRAME_SECONDS)
+        # Bornes arrondies à la milliseconde, la précision des RTTM
+        new_starts = np.maximum(starts, np.round(next_speech[first_frame] * FRAME_SECONDS, 3))
+        new_ends = np.minimum(ends, np.round((prev_speech[np.maximum(end_frame - 1, 0)] + 1) * FRAME_SECONDS, 3))
+
+        windows, removed = [], []
+        trimmed = 0
+        for i, (segment, speaker) in enumerate(segments):
+            if not keep[i]:
+                windows.append(None)
+                removed.append((segment.start, segment.end, speaker, "skip"))
+                continue
+            # Écart de moins d'une milliseconde (arrondi) : borne d'origine conservée
+            start, end = float(new_starts[i]), float(new_ends[i])
+            if start - segment.start < 0.001:
+                start = segment.start
+            else:
+                removed.append((segment.start, start, speaker, "trim"))
+            if segment.end - end < 0.001:
+                end = segment.end
+            else:
+                removed.append((end, segment.end, speaker, "trim"))
+            trimmed += (start, end) != (segment.start, segment.end)
+            windows.append(Segment(start, end))
+        stats = {
+            "input_s": float(np.sum(ends - starts)),
+            "removed_s": float(sum(end - start for start, end, _, _ in removed)),
+            "skipped": int(np.sum(~keep)),
+            "trimmed": trimmed,
+        }
+        return windows, stats, removed
+
+
+def format_vad_stats(stats):
+    return (
+        f"🔇 VAD : {stats['removed_s']:.1f} s retirés sur {stats['input_s']:.1f} s "
+        f"({stats['skipped']} segment(s) sans parole ignoré(s), {stats['trimmed']} rogné(s))"
+    )
+
+
+def write_removed_rttm(removed, rttm_path, uri):
+    # RTTM de contrôle : zones retirées, libellées "skip_<locuteur>" ou "trim_<locuteur>"
+    from transcriber.segment_store import SegmentStore, _intern
+
+    names, ids = _intern([f"{reason}_{speaker}" for _, _, speaker, reason in removed])
+    store = SegmentStore([r[0] for r in removed], [r[1] for r in removed], ids, names, uris=[uri])
+    store.sorted().write_rttm(rttm_path)
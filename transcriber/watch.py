@@ -0,0 +1,150 @@
+import os
+import queue
+import signal
+import threading
+import time
+
+from transcriber.defaults import AUDIO_EXTENSIONS, WATCH_INTERVAL, WATCH_SETTLE
+from transcriber.metrics import METRICS
+
+
+# === SURVEILLANCE DU DOSSIER D'ENTRÉE ===
+# Les événements inotify (watchdog, si installé) signalent les nouveaux
+# fichiers ; sinon le dossier est relu à chaque intervalle. Un fichier n'est
+# transmis que lorsque sa taille et sa date n'ont pas changé depuis `settle`
+# secondes, c'est-à-dire quand l'enregistreur a fini de l'écrire.
+class FolderWatcher:
+    def __init__(self, folder, on_ready, interval=WATCH_INTERVAL, settle=WATCH_SETTLE, polling=False):
+        self.folder = folder
+        self.on_ready = on_ready
+        self.interval = interval
+        self.settle = settle
+        self.candidates = {}  # nom → (taille, mtime, dernier changement, première détection)
+        self.submitted = set()
+        self.events = queue.SimpleQueue()  # noms signalés par le thread watchdog
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.observer = None if polling else self._start_observer()
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        events, wake = self.events, self.wake
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    events.put(os.path.basename(getattr(event, "dest_path", "") or event.src_path))
+                    wake.set()
+
+        observer = Observer()
+        observer.schedule(Handler(), self.folder, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    @property
+    def mode(self):
+        return "inotify" if self.observer else f"scrutation toutes les {self.interval:g} s"
+
+    def notice(self, name):
+        if name.lower().endswith(AUDIO_EXTENSIONS) and name not in self.submitted and not name.startswith("."):
+            self.candidates.setdefault(name, (-1, -1, time.time(), time.time()))
+
+    def collect(self):
+        if self.observer is None:
+            for name in os.listdir(self.folder):
+                self.notice(name)
+        while not self.events.empty():
+            self.notice(self.events.get())
+
+    def check(self):
+        # Renvoie les fichiers stables depuis `settle` secondes, dans l'ordre d'arrivée
+        now = time.time()
+        ready = []
+        for name, (size, mtime, changed, seen) in list(self.candidates.items()):
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                del self.candidates[name]
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                self.candidates[name] = (stat.st_size, stat.st_mtime, now, seen)
+            elif stat.st_size > 0 and now - changed >= self.settle:
+                ready.append((seen, name))
+        return [name for _, name in sorted(ready)]
+
+    def forget_archived(self):
+        # Un fichier soumis quitte le dossier à l'archivage (ou vers failed/ en
+        # cas d'échec) : le même nom peut revenir
+        self.submitted = {name for name in self.submitted if os.path.exists(os.path.join(self.folder, name))}
+
+    def run(self):
+        for name in os.listdir(self.folder):
+            self.notice(name)
+        try:
+            self._loop()
+        finally:
+            if self.observer:
+                self.observer.stop()
+                self.observer.join()
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            self.collect()
+            for name in self.check():
+                seen = self.candidates.pop(name)[3]
+                try:
+                    name = normalize_name(self.folder, name)
+                except FileNotFoundError:
+                    continue  # supprimé ou déplacé entre le contrôle et le renommage
+                self.submitted.add(name)
+                METRICS.observe("watch_ready_seconds", time.time() - seen)
+                self.on_ready(name)
+            self.forget_archived()
+            # Fichier en cours d'écriture : nouveau contrôle une fois le délai écoulé
+            timeout = min(self.interval, self.settle / 2) if self.candidates else self.interval
+            self.wake.wait(timeout)
+            self.wake.clear()
+            # Une copie génère des rafales d'événements : au plus un contrôle toutes les 100 ms
+            self.stopping.wait(0.1)
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+
+
+def normalize_name(folder, name):
+    # Même règle que list_input_files : espaces remplacés par des underscores
+    normalized = name.replace(" ", "_")
+    if normalized != name:
+        os.rename(os.path.join(folder, name), os.path.join(folder, normalized))
+    return normalized
+
+
+# === SERVICE : PIPELINE RÉSIDENT + SURVEILLANCE ===
+def serve(runner, interval=WATCH_INTERVAL, settle=WATCH_SETTLE, polling=False):
+    # Les modèles sont chargés une fois ; chaque fichier complet entre dans le
+    # pipeline à trois étapes (conversion → diarisation → transcription) dont
+    # les files bornées limitent le nombre de fichiers en cours.
+    runner.start()
+
+    def submit(name):
+        print(f"\n📥 Nouveau fichier : {name}")
+        METRICS.count("watch_files_total")
+        runner.submit(name)
+
+    watcher = FolderWatcher(runner.input_folder, submit, interval, settle, polling)
+    # SIGTERM (systemd, docker stop) : même arrêt propre que Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    print(f"\n👀 Surveillance de '{runner.input_folder}/' ({watcher.mode}). Ctrl+C pour arrêter.")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    print("\n🛑 Arrêt demandé : fin des fichiers en cours...")
+    return runner.finish()
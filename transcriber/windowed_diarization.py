@@ -0,0 +1,180 @@
+import resource
+import threading
+import wave
+
+import numpy as np
+from pyannote.core import Annotation, Segment
+
+from transcriber.defaults import DEFAULT_STITCH_THRESHOLD, DEFAULT_WINDOW_OVERLAP, SAMPLE_RATE
+
+DEFAULT_WINDOW = 600.0
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# === PIC MÉMOIRE D'UNE PASSE ===
+# ru_maxrss couvre toute la vie du processus : après un premier fichier, il
+# inclut les passes précédentes. Sous Linux, le pic (VmHWM) est remis au RSS
+# courant en écrivant 5 dans /proc/self/clear_refs ; ailleurs, le RSS est
+# échantillonné toutes les 10 ms le temps de la passe.
+def _status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise OSError(field)
+
+
+class PeakMemory:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss_mb(self):
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self._rss_mb())
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            self.start_mb = _status_mb("VmHWM")
+        except OSError:
+            self.start_mb = self.peak_mb = self._rss_mb()
+            self._thread = threading.Thread(target=self._sample, name="peak-memory", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is None:
+            self.peak_mb = _status_mb("VmHWM")
+        else:
+            self._stop.set()
+            self._thread.join()
+            self.peak_mb = max(self.peak_mb, self._rss_mb())
+        return False
+
+
+# === LECTURE PAR FENÊTRES ===
+def iter_windows(audio, window, overlap):
+    # `audio` : chemin d'un WAV 16 kHz mono 16 bits (lu fenêtre par fenêtre)
+    # ou tampon PCM int16 déjà en mémoire.
+    # Produit (début en s, PCM int16, dernière fenêtre ?).
+    step = int((window - overlap) * SAMPLE_RATE)
+    size = int(window * SAMPLE_RATE)
+    if isinstance(audio, np.ndarray):
+        total = len(audio)
+        for first in range(0, max(total, 1), step):
+            last = first + size >= total
+            yield first / SAMPLE_RATE, audio[first:first + size], last
+            if last:
+                break
+        return
+
+    with wave.open(audio, "rb") as wf:
+        total = wf.getnframes()
+        for first in range(0, max(total, 1), step):
+            wf.setpos(first)
+            last = first + size >= total
+            yield first / SAMPLE_RATE, np.frombuffer(wf.readframes(size), dtype="<i2"), last
+            if last:
+                break
+
+
+# === DIARISATION FENÊTRÉE À MÉMOIRE BORNÉE ===
+# Chaque fenêtre est diarisée séparément ; ses locuteurs sont rattachés aux
+# locuteurs globaux par similarité cosinus de leurs embeddings (centroïdes
+# mis à jour au fil des fenêtres). Dans les zones de recouvrement, chaque
+# fenêtre ne garde que sa moitié, puis les tours contigus sont recollés.
+class WindowedDiarizer:
+    def __init__(self, pipeline, window=DEFAULT_WINDOW, overlap=DEFAULT_WINDOW_OVERLAP, threshold=DEFAULT_STITCH_THRESHOLD):
+        if overlap >= window:
+            raise ValueError("Le recouvrement doit être plus court que la fenêtre.")
+        self.pipeline = pipeline
+        self.window = window
+        self.overlap = overlap
+        self.threshold = threshold
+
+    def _diarize_window(self, pcm, audio_key=None, options=None):
+        import torch
+
+        waveform = torch.from_numpy(pcm.astype(np.float32) / 32768.0).unsqueeze(0)
+        file = {"waveform": waveform, "sample_rate": SAMPLE_RATE}
+        if audio_key:
+            file["audio_key"] = audio_key
+        annotation, embeddings = self.pipeline(file, return_embeddings=True, **(options or {}))
+        return annotation, dict(zip(annotation.labels(), embeddings))
+
+    def _match(self, local_embeddings, centroids):
+        # Appariement glouton par similarité décroissante, un locuteur global
+        # au plus par locuteur local dans une même fenêtre.
+        mapping = {}
+        candidates = []
+        for label, embedding in local_embeddings.items():
+            if np.isnan(embedding).any():
+                continue
+            unit = embedding / (np.linalg.norm(embedding) + 1e-8)
+            for idx, (total, _) in enumerate(centroids):
+                centroid = total / (np.linalg.norm(total) + 1e-8)
+                candidates.append((1 - float(unit @ centroid), label, idx))
+        used = set()
+        for distance, label, idx in sorted(candidates):
+            if distance > self.threshold or label in mapping or idx in used:
+                continue
+            mapping[label] = idx
+            used.add(idx)
+        for label, embedding in local_embeddings.items():
+            valid = not np.isnan(embedding).any()
+            if label not in mapping:
+                mapping[label] = len(centroids)
+                centroids.append([np.zeros_like(embedding) if not valid else embedding.copy(), int(valid)])
+            elif valid:
+                centroids[mapping[label]][0] += embedding
+                centroids[mapping[label]][1] += 1
+        return mapping
+
+    def __call__(self, audio, uri=None, audio_key=None, num_speakers=None, min_speakers=None, max_speakers=None):
+        # Une fenêtre peut ne contenir qu'une partie des locuteurs : seul le
+        # maximum s'applique fenêtre par fenêtre.
+        max_speakers = max_speakers or num_speakers
+        options = {"max_speakers": max_speakers} if max_speakers else {}
+        result = Annotation(uri=uri)
+        centroids = []
+        half = self.overlap / 2
+        track = 0
+        for offset, pcm, last in iter_windows(audio, self.window, self.overlap):
+            window_key = f"{audio_key}-w{self.window:g}-{self.overlap:g}-{offset:g}" if audio_key else None
+            local, local_embeddings = self._diarize_window(pcm, window_key, options)
+            mapping = self._match(local_embeddings, centroids)
+            duration = len(pcm) / SAMPLE_RATE
+            own_start = 0.0 if offset == 0 else half
+            own_end = duration if last else duration - half
+            for segment, _, label in local.crop(Segment(own_start, own_end)).itertracks(yield_label=True):
+                result[Segment(segment.start + offset, segment.end + offset), track] = f"SPEAKER_{mapping[label]:02d}"
+                track += 1
+        return result.support()
+
+
+# === COMPARAISON AVEC LA DIARISATION DU FICHIER ENTIER ===
+def compare_with_whole_file(pipeline, audio, windowed, windowed_memory):
+    # Relance le pipeline sur tout le fichier (référence) pour mesurer l'écart
+    # de DER ; `windowed_memory` est le PeakMemory de la passe fenêtrée, la
+    # passe entière est mesurée de la même façon.
+    from pyannote.metrics.diarization import DiarizationErrorRate
+
+    with PeakMemory() as whole_memory:
+        reference = pipeline(audio)
+    der = DiarizationErrorRate()(reference, windowed)
+    return {
+        "windowed_rss_mb": windowed_memory.peak_mb, "windowed_added_mb": windowed_memory.peak_mb - windowed_memory.start_mb,
+        "whole_rss_mb": whole_memory.peak_mb, "whole_added_mb": whole_memory.peak_mb - whole_memory.start_mb, "der": der,
+    }
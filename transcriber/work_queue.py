@@ -0,0 +1,237 @@
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from transcriber.defaults import AUDIO_EXTENSIONS, QUEUE_LEASE, QUEUE_POLL
+from transcriber.metrics import METRICS
+
+CLAIMS_FOLDER = ".claims"
+
+
+# === FILE DE TRAVAIL SUR DOSSIER PARTAGÉ ===
+# Plusieurs processus (sur une ou plusieurs machines montant le même dossier
+# NFS/SMB) se partagent les fichiers d'une étape sans serveur central :
+#   <dossier>/.claims/<étape>/<nom>.claim   bail du worker qui traite <nom>
+#   <dossier>/.claims/<étape>/<nom>.done    fichier terminé
+#   <dossier>/.claims/<étape>/<nom>.failed  échec, non retenté (message d'erreur)
+# Les marqueurs .done/.failed portent la signature (taille, date) du fichier
+# traité : un nouveau fichier du même nom est traité à son tour.
+# Un bail est pris par os.link d'un fichier temporaire, atomique et exclusif
+# même sur NFS, et prolongé par un thread qui met à jour sa date. Un bail
+# dont la date n'a pas bougé depuis `lease` secondes (worker arrêté ou
+# machine tombée) est repris par un autre worker. Les dates sont comparées
+# à l'horloge du serveur de fichiers, pas à celle de chaque machine.
+def file_signature(path):
+    # Taille et date de modification (horloge du serveur de fichiers)
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def list_files(folder, extensions=AUDIO_EXTENSIONS):
+    # {nom sans extension (espaces → underscores) : (signature, fichier)} ;
+    # un fichier archivé par un autre worker entre-temps est ignoré
+    items = {}
+    for filename in os.listdir(folder):
+        if filename.lower().endswith(extensions):
+            try:
+                items[os.path.splitext(filename.replace(" ", "_"))[0]] = (
+                    file_signature(os.path.join(folder, filename)), filename
+                )
+            except FileNotFoundError:
+                pass
+    return items
+
+
+class WorkQueue:
+    def __init__(self, root, stage, lease=QUEUE_LEASE, poll=QUEUE_POLL):
+        self.root = root
+        self.stage = stage
+        self.folder = os.path.join(root, CLAIMS_FOLDER, stage)
+        self.lease = lease
+        self.poll = poll
+        self.worker = f"{socket.gethostname()}-{os.getpid()}"
+        self.held = set()
+        self.signatures = {}
+        self.lost = set()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        os.makedirs(self.folder, exist_ok=True)
+        self.heartbeat = threading.Thread(target=self._heartbeat, name=f"bail-{stage}", daemon=True)
+        self.heartbeat.start()
+
+    def path(self, name, kind="claim"):
+        return os.path.join(self.folder, f"{name}.{kind}")
+
+    def _write(self, path, text):
+        tmp_path = f"{path}.{self.worker}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        return tmp_path
+
+    def _now(self):
+        # Heure du serveur de fichiers : date d'un fichier que l'on vient de toucher
+        clock = os.path.join(self.folder, f".clock.{self.worker}")
+        with open(clock, "a"):
+            os.utime(clock)
+        return os.stat(clock).st_mtime
+
+    def _expired(self, path, now):
+        try:
+            return now - os.stat(path).st_mtime > self.lease
+        except FileNotFoundError:
+            return False
+
+    def owner(self, name):
+        try:
+            with open(self.path(name)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _marker(self, name, kind):
+        try:
+            with open(self.path(name, kind)) as f:
+                return f.readline().strip()
+        except FileNotFoundError:
+            return None
+
+    def settled(self, name, signature):
+        return signature in (self._marker(name, "done"), self._marker(name, "failed"))
+
+    def claim(self, name, signature):
+        if self.settled(name, signature):
+            return False
+        path = self.path(name)
+        tmp_path = self._write(path, self.worker)
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            if not self._reclaim(name, tmp_path):
+                return False
+        finally:
+            os.remove(tmp_path)
+        # Terminé par un autre worker entre le listage et le bail
+        if self.settled(name, signature):
+            os.remove(path)
+            return False
+        with self.lock:
+            self.held.add(name)
+            self.signatures[name] = signature
+        METRICS.count("queue_claims_total", stage=self.stage)
+        return True
+
+    def _reclaim(self, name, tmp_path):
+        # Bail expiré : renommé sous un nom propre à ce worker (un seul
+        # renommage réussit), puis remplacé par le nôtre. Si le bail a été
+        # renouvelé entre-temps, il est remis en place.
+        path = self.path(name)
+        if not self._expired(path, self._now()):
+            return False
+        stale_path = f"{path}.{self.worker}.stale"
+        try:
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            return False
+        with open(stale_path) as f:
+            previous = f.read().strip()
+        if not self._expired(stale_path, self._now()):
+            try:
+                os.link(stale_path, path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            return False
+        print(f"♻️ Bail expiré de {previous} repris pour {name}")
+        METRICS.count("queue_reclaims_total", stage=self.stage)
+        return True
+
+    def _heartbeat(self):
+        while not self.stopping.wait(self.lease / 4):
+            with self.lock:
+                held = list(self.held)
+            for name in held:
+                # Bail repris par un autre worker (machine restée figée trop longtemps)
+                if self.owner(name) != self.worker:
+                    if name not in self.lost:
+                        self.lost.add(name)
+                        print(f"⚠️ Bail perdu pour {name} : un autre worker l'a repris")
+                    continue
+                try:
+                    os.utime(self.path(name))
+                except FileNotFoundError:
+                    pass
+
+    def _release(self, name, kind=None, text=""):
+        with self.lock:
+            self.held.discard(name)
+            signature = self.signatures.pop(name, "")
+        if kind:
+            marker = f"{signature}\n{text or self.worker}\n"
+            os.replace(self._write(self.path(name, kind), marker), self.path(name, kind))
+        if self.owner(name) == self.worker:
+            os.remove(self.path(name))
+
+    @contextmanager
+    def hold(self, name):
+        # Marque <nom> terminé en fin de bloc, ou en échec (sans nouvelle
+        # tentative par les autres workers) si une exception s'est produite
+        try:
+            yield
+        except BaseException as error:
+            if isinstance(error, Exception):
+                self._release(name, "failed", f"{self.worker}: {type(error).__name__}: {error}")
+            else:
+                # Ctrl+C : le fichier redevient disponible immédiatement
+                self._release(name)
+            raise
+        self._release(name, "done")
+
+    def active(self):
+        return any(name.endswith(".claim") for name in os.listdir(self.folder))
+
+    def busy(self, list_items):
+        # Fichiers en cours, ou en attente d'un worker de cette étape
+        return self.active() or any(
+            not self.settled(name, signature) for name, (signature, _) in list_items().items()
+        )
+
+    def claims(self, list_items, upstream=()):
+        # Produit les (nom, élément) obtenus, de list_items() → {nom: (signature,
+        # élément)}. S'arrête quand plus rien n'est disponible ni en cours ici,
+        # ni en attente ou en cours dans les étapes amont : upstream contient
+        # des (file, list_items) de ces étapes, qui produiront d'autres fichiers.
+        waiting = False
+        while True:
+            claimed = None
+            for name, (signature, item) in sorted(list_items().items()):
+                if not self.settled(name, signature) and self.claim(name, signature):
+                    claimed = (name, item)
+                    break
+            if claimed:
+                waiting = False
+                yield claimed
+                continue
+            if not self.active() and not any(queue.busy(items) for queue, items in upstream):
+                return
+            if not waiting:
+                print(f"⏳ En attente de fichiers ({self.stage}) : étape amont ou autre worker en cours...")
+                waiting = True
+            time.sleep(self.poll)
+
+    def close(self):
+        self.stopping.set()
+        with self.lock:
+            held, self.held = list(self.held), set()
+        for name in held:
+            self._release(name)
+        try:
+            os.remove(os.path.join(self.folder, f".clock.{self.worker}"))
+        except FileNotFoundError:
+            pass
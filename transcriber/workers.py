@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import threading
+import time
+import wave
+
+from transcriber.metrics import METRICS
+from transcriber.transcription import transcribe_file
+
+
+def get_duration(wav_file):
+    with wave.open(wav_file, "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+# === PARALLÉLISME MULTI-PROCESSUS ===
+# Chaque worker charge le modèle une fois ; les fichiers sont distribués un
+# par un via la file partagée du pool, dans l'ordre donné par l'appelant.
+# L'avancement segment par segment remonte au processus principal par une
+# file, pour le temps restant estimé.
+_worker_model = None
+_worker_options = None
+_worker_progress = None
+
+def _init_worker(model_name, threads, options, cpu_optimized=False, cache_dir=None, progress_queue=None,
+                 shared_weights=False):
+    global _worker_model, _worker_options, _worker_progress
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    from transcriber.cpu_inference import load_model, memory_usage_mb
+    _worker_model = load_model(model_name, cpu_optimized=cpu_optimized, cache_dir=cache_dir, shared_weights=shared_weights)
+    _worker_options = options
+    _worker_progress = progress_queue
+    uss, rss = memory_usage_mb()
+    print(f"🧠 Worker {os.getpid()} : {uss:.0f} Mo propres (USS), {rss:.0f} Mo résidents (RSS)")
+
+def _transcribe_job(job):
+    # Les mesures du worker sont renvoyées avec chaque fichier et fusionnées
+    # dans le registre du processus principal.
+    wav_file, rttm_path, output_path, _ = job
+    METRICS.reset()
+    progress = None
+    if _worker_progress is not None:
+        progress = lambda done, total: _worker_progress.put((wav_file, done, total))
+    start = time.time()
+    transcribe_file(wav_file, rttm_path, output_path, _worker_model, progress=progress, **_worker_options)
+    seconds = time.time() - start
+    from transcriber.cpu_inference import memory_usage_mb
+    METRICS.peak("worker_uss_mb", round(memory_usage_mb()[0], 1), pid=os.getpid())
+    return job, seconds, METRICS.snapshot()
+
+def _forward_progress(progress_queue, on_progress):
+    for message in iter(progress_queue.get, None):
+        on_progress(*message)
+
+def run_workers(jobs, model_name, workers, options, cpu_optimized=False, cache_dir=None, on_progress=None, on_done=None,
+                shared_weights=False):
+    # on_progress(fichier, segments faits, total) ; on_done(job, secondes)
+    if shared_weights and not cpu_optimized:
+        # Fichier de poids créé une fois ici, puis projeté par chaque worker
+        from transcriber.cpu_inference import prepare_shared_weights
+        print(f"🔗 Poids partagés entre workers : {prepare_shared_weights(model_name, cache_dir)}")
+    if cpu_optimized:
+        from transcriber.cpu_inference import physical_cores
+        threads = max(1, physical_cores() // workers)
+    else:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧵 {workers} workers × {threads} threads torch")
+    ctx = multiprocessing.get_context("spawn")
+    progress_queue = ctx.Queue() if on_progress else None
+    if on_progress:
+        forwarder = threading.Thread(target=_forward_progress, args=(progress_queue, on_progress), daemon=True)
+        forwarder.start()
+    initargs = (model_name, threads, options, cpu_optimized, cache_dir, progress_queue, shared_weights)
+    with ctx.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        for job, seconds, snapshot in pool.imap_unordered(_transcribe_job, jobs, chunksize=1):
+            METRICS.merge(snapshot)
+            if on_done:
+                on_done(job, seconds)
+    if on_progress:
+        progress_queue.put(None)
+        forwarder.join()